@@ -1,285 +1,575 @@
-import random
-import time
-from typing import Any, Dict, List, Optional
-
-import anthropic
-from anthropic import APIError, RateLimitError
-from anthropic._exceptions import OverloadedError
-
-
-class AIGenerator:
-    """Handles interactions with Anthropic's Claude API for generating responses"""
-
-    # Static system prompt to avoid rebuilding on each call
-    SYSTEM_PROMPT = """ You are an AI assistant specialized in course materials and educational content with access to comprehensive search tools for course information.
-
-Available Tools:
-1. **Course Content Search** - Use for questions about specific course content or detailed educational materials
-2. **Course Outline** - Use for questions about course structure, lesson lists, or course overview information
-
-Tool Selection Guidelines:
-- **Course outline queries**: Use get_course_outline for questions about:
-  - Course structure or lesson lists
-  - "What lessons are in [course]?"
-  - "Show me the outline for [course]"
-  - Course overview or table of contents requests
-- **Content-specific queries**: Use search_course_content for questions about:
-  - Specific educational content within lessons
-  - Technical details or explanations
-  - Examples or code samples from lessons
-
-Tool Usage Rules:
-- **You may make multiple tool calls across up to 2 rounds** to gather comprehensive information
-- **First round**: Use tools to gather initial information
-- **Second round** (if needed): Use additional tools to gather more specific or related information
-- For outline queries, return the complete course title, course link, and numbered lesson list
-- Synthesize search results into accurate, fact-based responses
-- If search yields no results, state this clearly without offering alternatives
-
-Response Protocol:
-- **General knowledge questions**: Answer using existing knowledge without searching
-- **Course-specific questions**: Use appropriate tool(s) first, then answer
-- **Complex questions**: You may use multiple rounds of tool calls to gather comprehensive information
-- **No meta-commentary**:
- - Provide direct answers only — no reasoning process, search explanations, or question-type analysis
- - Do not mention "based on the search results"
-
-All responses must be:
-1. **Brief, Concise and focused** - Get to the point quickly
-2. **Educational** - Maintain instructional value
-3. **Clear** - Use accessible language
-4. **Example-supported** - Include relevant examples when they aid understanding
-Provide only the direct answer to what was asked.
-"""
-
-    def __init__(
-        self,
-        api_key: str,
-        model: str,
-        max_retries: int = 3,
-        retry_delay: float = 1.0,
-        max_retry_delay: float = 60.0,
-    ):
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = model
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
-        self.max_retry_delay = max_retry_delay
-
-        # Pre-build base API parameters
-        self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
-
-    def generate_response(
-        self,
-        query: str,
-        conversation_history: Optional[str] = None,
-        tools: Optional[List] = None,
-        tool_manager=None,
-        max_rounds: int = 2,
-    ) -> str:
-        """
-        Generate AI response with support for sequential tool calling.
-
-        Args:
-            query: The user's question or request
-            conversation_history: Previous messages for context
-            tools: Available tools the AI can use
-            tool_manager: Manager to execute tools
-            max_rounds: Maximum number of tool call rounds (default: 2)
-
-        Returns:
-            Generated response as string
-        """
-
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
-
-        # Initialize conversation state
-        messages = [{"role": "user", "content": query}]
-
-        # Execute sequential tool calling rounds
-        return self._execute_sequential_rounds(
-            messages, system_content, tools, tool_manager, max_rounds
-        )
-
-    def _execute_sequential_rounds(
-        self,
-        messages: List[Dict],
-        system_content: str,
-        tools: Optional[List],
-        tool_manager,
-        max_rounds: int,
-    ) -> str:
-        """
-        Execute up to max_rounds of sequential tool calling.
-
-        Termination conditions:
-        1. max_rounds completed
-        2. Claude's response has no tool_use blocks
-        3. Tool execution fails
-
-        Args:
-            messages: List of conversation messages
-            system_content: System prompt content
-            tools: Available tools the AI can use
-            tool_manager: Manager to execute tools
-            max_rounds: Maximum number of rounds to execute
-
-        Returns:
-            Final response as string
-        """
-
-        current_round = 0
-
-        while current_round < max_rounds:
-            current_round += 1
-
-            # Prepare API parameters
-            api_params = {
-                **self.base_params,
-                "messages": messages,
-                "system": system_content,
-            }
-
-            # Add tools only if we have them and a tool manager
-            if tools and tool_manager:
-                api_params["tools"] = tools
-                api_params["tool_choice"] = {"type": "auto"}
-
-            # Make API call
-            try:
-                response = self._make_api_call_with_retry(api_params)
-            except Exception as e:
-                # Tool execution failed - terminate
-                return f"I encountered an error while processing your request: {str(e)}"
-
-            # Check termination condition: no tool use
-            if response.stop_reason != "tool_use":
-                # Claude provided final response without tools
-                return response.content[0].text
-
-            # Handle tool execution for this round
-            if not tool_manager:
-                return "Tools were requested but no tool manager was provided."
-
-            tool_results = self._execute_tools_for_round(response, tool_manager)
-
-            # Check termination condition: tool execution failed
-            if tool_results is None:
-                return "I encountered an error while executing the requested tools."
-
-            # Add AI's tool use response to conversation
-            messages.append({"role": "assistant", "content": response.content})
-
-            # Add tool results to conversation
-            messages.append({"role": "user", "content": tool_results})
-
-            # Continue to next round if we haven't hit max_rounds
-            # The while loop will handle the max_rounds termination
-
-        # Max rounds reached - make final API call without tools
-        final_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": system_content,
-            # Deliberately no tools for final call
-        }
-
-        try:
-            final_response = self._make_api_call_with_retry(final_params)
-            return final_response.content[0].text
-        except Exception as e:
-            return (
-                f"I encountered an error while generating the final response: {str(e)}"
-            )
-
-    def _execute_tools_for_round(self, response, tool_manager) -> Optional[List[Dict]]:
-        """
-        Execute all tool calls for a single round.
-
-        Args:
-            response: API response containing tool use requests
-            tool_manager: Manager to execute tools
-
-        Returns:
-            List of tool results, or None if execution failed
-        """
-
-        tool_results = []
-
-        try:
-            for content_block in response.content:
-                if content_block.type == "tool_use":
-                    tool_result = tool_manager.execute_tool(
-                        content_block.name, **content_block.input
-                    )
-
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": tool_result,
-                        }
-                    )
-
-            return tool_results if tool_results else None
-
-        except Exception as e:
-            print(f"Tool execution failed: {e}")
-            return None
-
-    def _make_api_call_with_retry(self, api_params: Dict[str, Any]):
-        """
-        Make API call with exponential backoff retry logic.
-
-        Args:
-            api_params: Parameters for the API call
-
-        Returns:
-            Response from the API
-
-        Raises:
-            APIError: After all retries are exhausted
-        """
-        last_exception = None
-
-        for attempt in range(self.max_retries + 1):
-            try:
-                return self.client.messages.create(**api_params)
-
-            except (OverloadedError, RateLimitError) as e:
-                last_exception = e
-                if attempt == self.max_retries:
-                    # Final attempt failed
-                    print(f"API call failed after {self.max_retries + 1} attempts: {e}")
-                    raise
-
-                # Calculate delay with exponential backoff and jitter
-                delay = min(
-                    self.retry_delay * (2**attempt) + random.uniform(0, 1),
-                    self.max_retry_delay,
-                )
-
-                print(
-                    f"API call failed (attempt {attempt + 1}/{self.max_retries + 1}): {e}"
-                )
-                print(f"Retrying in {delay:.2f} seconds...")
-                time.sleep(delay)
-
-            except APIError as e:
-                # For other API errors, don't retry
-                print(f"Non-retryable API error: {e}")
-                raise
-
-            except Exception as e:
-                # For unexpected errors, don't retry
-                print(f"Unexpected error in API call: {e}")
-                raise
-
-        # This shouldn't be reached, but just in case
-        if last_exception:
-            raise last_exception
+import asyncio
+import logging
+import random
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import anthropic
+import httpx
+from anthropic import APIError, DefaultAioHttpClient, RateLimitError
+from anthropic._exceptions import OverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class AIGenerator:
+    """Handles interactions with Anthropic's Claude API for generating responses"""
+
+    # Static system prompt to avoid rebuilding on each call
+    SYSTEM_PROMPT = """ You are an AI assistant specialized in course materials and educational content with access to comprehensive search tools for course information.
+
+Available Tools:
+1. **Course Content Search** - Use for questions about specific course content or detailed educational materials
+2. **Course Outline** - Use for questions about course structure, lesson lists, or course overview information
+
+Tool Selection Guidelines:
+- **Course outline queries**: Use get_course_outline for questions about:
+  - Course structure or lesson lists
+  - "What lessons are in [course]?"
+  - "Show me the outline for [course]"
+  - Course overview or table of contents requests
+- **Content-specific queries**: Use search_course_content for questions about:
+  - Specific educational content within lessons
+  - Technical details or explanations
+  - Examples or code samples from lessons
+
+Tool Usage Rules:
+- **You may make multiple tool calls across up to 2 rounds** to gather comprehensive information
+- **First round**: Use tools to gather initial information
+- **Second round** (if needed): Use additional tools to gather more specific or related information
+- For outline queries, return the complete course title, course link, and numbered lesson list
+- Synthesize search results into accurate, fact-based responses
+- If search yields no results, state this clearly without offering alternatives
+
+Response Protocol:
+- **General knowledge questions**: Answer using existing knowledge without searching
+- **Course-specific questions**: Use appropriate tool(s) first, then answer
+- **Complex questions**: You may use multiple rounds of tool calls to gather comprehensive information
+- **No meta-commentary**:
+ - Provide direct answers only — no reasoning process, search explanations, or question-type analysis
+ - Do not mention "based on the search results"
+
+All responses must be:
+1. **Brief, Concise and focused** - Get to the point quickly
+2. **Educational** - Maintain instructional value
+3. **Clear** - Use accessible language
+4. **Example-supported** - Include relevant examples when they aid understanding
+Provide only the direct answer to what was asked.
+"""
+
+    # Cheap client-side patterns for queries that almost always lead Claude
+    # to a single get_course_outline tool call on round 1
+    _OUTLINE_QUERY_PATTERNS = [
+        re.compile(r"what lessons are in (?:the )?(.+?)[?.]*$", re.IGNORECASE),
+        re.compile(
+            r"show me the outline (?:for|of) (?:the )?(.+?)[?.]*$", re.IGNORECASE
+        ),
+        re.compile(
+            r"(?:course )?outline (?:for|of) (?:the )?(.+?)[?.]*$", re.IGNORECASE
+        ),
+        re.compile(
+            r"table of contents (?:for|of) (?:the )?(.+?)[?.]*$", re.IGNORECASE
+        ),
+    ]
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        request_timeout: float = 20.0,
+    ):
+        # Async client with aiohttp backend so the event loop is released
+        # during network waits; SDK retries disabled since we wrap our own.
+        # Pool sized for many concurrent users so calls reuse warm TCP+TLS
+        # connections instead of paying the handshake on each request
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            http_client=DefaultAioHttpClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=64,
+                    max_connections=128,
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            ),
+            max_retries=0,
+        )
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.request_timeout = request_timeout
+
+        # Pre-build base API parameters
+        self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
+
+        # Pre-compile the static system blocks and request template once;
+        # per call only messages (and the optional history block) vary
+        self._system_blocks_cached = [
+            {
+                "type": "text",
+                "text": self.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        self._request_template = {**self.base_params, "system": self._system_blocks_cached}
+
+    async def warm_up_connection(self):
+        """Pre-establish the TLS session so the first user request skips handshake cost"""
+        try:
+            await self.client._client.head(
+                "https://api.anthropic.com/v1/messages", timeout=5.0
+            )
+        except Exception as e:
+            # Warm-up is best-effort; any response still primed the connection
+            logger.info("Anthropic connection warm-up skipped: %s", e)
+
+    async def generate_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        max_rounds: int = 2,
+    ) -> str:
+        """
+        Generate AI response with support for sequential tool calling.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of tool call rounds (default: 2)
+
+        Returns:
+            Generated response as string
+        """
+
+        # Reuse the pre-compiled static system blocks; only append the
+        # per-session history block (uncached - it changes every exchange)
+        if conversation_history:
+            system_content = self._system_blocks_cached + [
+                {
+                    "type": "text",
+                    "text": f"Previous conversation:\n{conversation_history}",
+                }
+            ]
+        else:
+            system_content = self._system_blocks_cached
+
+        # Initialize conversation state
+        messages = [{"role": "user", "content": query}]
+
+        # Speculatively pre-dispatch the likely first-round tool call so its
+        # result is ready by the time Claude asks for it; a miss costs one
+        # extra Chroma query, a hit removes a tool round from the wall clock
+        speculation = None
+        if tools and tool_manager:
+            prediction = self._predict_likely_tool(query)
+            if prediction is not None:
+                tool_name, tool_args = prediction
+                task = asyncio.create_task(
+                    asyncio.to_thread(tool_manager.execute_tool, tool_name, **tool_args)
+                )
+                # Retrieve any exception so unused speculations don't warn
+                task.add_done_callback(
+                    lambda t: None if t.cancelled() else t.exception()
+                )
+                speculation = (tool_name, tool_args, task)
+
+        # Execute sequential tool calling rounds
+        return await self._execute_sequential_rounds(
+            messages, system_content, tools, tool_manager, max_rounds, speculation
+        )
+
+    async def generate_response_stream(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        max_rounds: int = 2,
+    ):
+        """
+        Generate AI response as a stream of text chunks.
+
+        Tool-use rounds run through the non-streaming path (they need the
+        full content parsed before tools can execute); the final answer is
+        streamed token-by-token so the client can render it as it arrives
+        instead of waiting for the complete ~800-token completion.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of tool call rounds (default: 2)
+
+        Yields:
+            Response text chunks as strings
+        """
+
+        if conversation_history:
+            system_content = self._system_blocks_cached + [
+                {
+                    "type": "text",
+                    "text": f"Previous conversation:\n{conversation_history}",
+                }
+            ]
+        else:
+            system_content = self._system_blocks_cached
+
+        messages = [{"role": "user", "content": query}]
+
+        # Non-streaming tool rounds, mirroring _execute_sequential_rounds
+        current_round = 0
+        while tools and tool_manager and current_round < max_rounds:
+            current_round += 1
+
+            api_params = self._request_template | {
+                "messages": messages,
+                "system": system_content,
+                "tools": tools[:-1]
+                + [{**tools[-1], "cache_control": {"type": "ephemeral"}}],
+                "tool_choice": {"type": "auto"},
+            }
+
+            try:
+                response = await self._make_api_call_with_retry(api_params)
+            except Exception as e:
+                yield f"I encountered an error while processing your request: {str(e)}"
+                return
+
+            if response.stop_reason != "tool_use":
+                # Claude answered without tools - the full text is already
+                # here, so re-requesting it as a stream would only add cost
+                yield response.content[0].text
+                return
+
+            tool_results = await self._execute_tools_for_round(response, tool_manager)
+            if tool_results is None:
+                yield "I encountered an error while executing the requested tools."
+                return
+
+            messages.append({"role": "assistant", "content": response.content})
+            # Cache breakpoint on the last result - see _execute_sequential_rounds
+            tool_results[-1] = {
+                **tool_results[-1],
+                "cache_control": {"type": "ephemeral"},
+            }
+            messages.append({"role": "user", "content": tool_results})
+
+        # Final round - stream the answer token-by-token, no tools
+        final_params = self._request_template | {
+            "messages": messages,
+            "system": system_content,
+        }
+
+        try:
+            async with self.client.messages.stream(**final_params) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            yield f"I encountered an error while generating the final response: {str(e)}"
+
+    @classmethod
+    def _predict_likely_tool(cls, query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Predict the first-round tool call for outline-style queries, if any"""
+        for pattern in cls._OUTLINE_QUERY_PATTERNS:
+            match = pattern.search(query)
+            if match:
+                course_title = match.group(1).strip()
+                if course_title.lower().endswith(" course"):
+                    course_title = course_title[: -len(" course")].strip()
+                if course_title:
+                    return "get_course_outline", {"course_title": course_title}
+        return None
+
+    @staticmethod
+    def _discard_speculation(speculation):
+        """Cancel a pending speculative tool call that will not be used"""
+        if speculation is not None:
+            speculation[2].cancel()
+
+    async def _execute_sequential_rounds(
+        self,
+        messages: List[Dict],
+        system_content: List[Dict],
+        tools: Optional[List],
+        tool_manager,
+        max_rounds: int,
+        speculation: Optional[Tuple[str, Dict[str, Any], asyncio.Task]] = None,
+    ) -> str:
+        """
+        Execute up to max_rounds of sequential tool calling.
+
+        Termination conditions:
+        1. max_rounds completed
+        2. Claude's response has no tool_use blocks
+        3. Tool execution fails
+
+        Args:
+            messages: List of conversation messages
+            system_content: System prompt content
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            max_rounds: Maximum number of rounds to execute
+            speculation: Optional (tool_name, tool_input, task) pre-dispatched
+                before the first API call; consumed on round 1 if it matches
+
+        Returns:
+            Final response as string
+        """
+
+        current_round = 0
+
+        while current_round < max_rounds:
+            current_round += 1
+
+            # Prepare API parameters from the pre-compiled template
+            api_params = self._request_template | {
+                "messages": messages,
+                "system": system_content,
+            }
+
+            # Add tools only if we have them and a tool manager; marking the
+            # last tool definition caches the full tool schema prefix too
+            if tools and tool_manager:
+                api_params["tools"] = tools[:-1] + [
+                    {**tools[-1], "cache_control": {"type": "ephemeral"}}
+                ]
+                api_params["tool_choice"] = {"type": "auto"}
+
+            # Make API call
+            try:
+                response = await self._make_api_call_with_retry(api_params)
+            except Exception as e:
+                # Tool execution failed - terminate
+                self._discard_speculation(speculation)
+                return f"I encountered an error while processing your request: {str(e)}"
+
+            # Track cache effectiveness for the static prompt prefix
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                logger.debug(
+                    "Prompt cache usage: created=%s read=%s",
+                    getattr(usage, "cache_creation_input_tokens", 0),
+                    getattr(usage, "cache_read_input_tokens", 0),
+                )
+
+            # Check termination condition: no tool use
+            if response.stop_reason != "tool_use":
+                # Claude provided final response without tools
+                self._discard_speculation(speculation)
+                return response.content[0].text
+
+            # Handle tool execution for this round
+            if not tool_manager:
+                self._discard_speculation(speculation)
+                return "Tools were requested but no tool manager was provided."
+
+            tool_results = await self._execute_tools_for_round(
+                response, tool_manager, speculation
+            )
+            # The speculation only ever applies to the first round
+            speculation = None
+
+            # Check termination condition: tool execution failed
+            if tool_results is None:
+                return "I encountered an error while executing the requested tools."
+
+            # Add AI's tool use response to conversation
+            messages.append({"role": "assistant", "content": response.content})
+
+            # Add tool results to conversation; marking the last result sets a
+            # cache breakpoint so the next round's prompt prefix (system +
+            # messages so far) is served from cache and only new turns are paid
+            tool_results[-1] = {
+                **tool_results[-1],
+                "cache_control": {"type": "ephemeral"},
+            }
+            messages.append({"role": "user", "content": tool_results})
+
+            # Continue to next round if we haven't hit max_rounds
+            # The while loop will handle the max_rounds termination
+
+        # Max rounds reached - make final API call without tools
+        final_params = self._request_template | {
+            "messages": messages,
+            "system": system_content,
+            # Deliberately no tools for final call
+        }
+
+        try:
+            final_response = await self._make_api_call_with_retry(final_params)
+            return final_response.content[0].text
+        except Exception as e:
+            return (
+                f"I encountered an error while generating the final response: {str(e)}"
+            )
+
+    async def _execute_tools_for_round(
+        self, response, tool_manager, speculation=None
+    ) -> Optional[List[Dict]]:
+        """
+        Execute all tool calls for a single round concurrently.
+
+        Each tool call is an independent search with no data dependency, so
+        they are dispatched together with asyncio.gather - round latency is
+        the slowest tool instead of the sum of all tools.
+
+        Args:
+            response: API response containing tool use requests
+            tool_manager: Manager to execute tools
+            speculation: Optional (tool_name, tool_input, task) pre-dispatched
+                call; its in-flight task is reused when Claude requests the
+                same call, otherwise it is cancelled
+
+        Returns:
+            List of tool results, or None if the round had no tool calls
+        """
+
+        tool_calls = [
+            (content_block.id, content_block.name, content_block.input)
+            for content_block in response.content
+            if content_block.type == "tool_use"
+        ]
+
+        if not tool_calls:
+            self._discard_speculation(speculation)
+            return None
+
+        # Tool execution is sync (ChromaDB queries), so run in worker threads.
+        # A matching speculative task is already running - awaiting it instead
+        # of re-dispatching means its head start counts toward this round
+        speculation_used = False
+        pending = []
+        for _, tool_name, tool_input in tool_calls:
+            if (
+                speculation is not None
+                and not speculation_used
+                and tool_name == speculation[0]
+                and tool_input == speculation[1]
+            ):
+                pending.append(speculation[2])
+                speculation_used = True
+            else:
+                pending.append(
+                    asyncio.to_thread(tool_manager.execute_tool, tool_name, **tool_input)
+                )
+        if speculation is not None and not speculation_used:
+            self._discard_speculation(speculation)
+
+        results = await asyncio.gather(*pending, return_exceptions=True)
+
+        tool_results = []
+        for (tool_use_id, _, _), result in zip(tool_calls, results):
+            if isinstance(result, BaseException):
+                # Surface the failure to Claude so it can recover instead of
+                # failing the whole round
+                logger.warning("Tool execution failed: %s", result)
+                tool_results.append(
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_use_id,
+                        "content": f"Tool execution failed: {result}",
+                        "is_error": True,
+                    }
+                )
+            else:
+                tool_results.append(
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_use_id,
+                        "content": result,
+                    }
+                )
+
+        return tool_results
+
+    @staticmethod
+    def _get_retry_after_hint(error: Exception) -> Optional[float]:
+        """Extract the server-suggested retry delay (seconds) from a 429/529 error"""
+        try:
+            headers = error.response.headers
+            retry_after = headers.get("retry-after")
+            if retry_after is not None:
+                return float(retry_after)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        return None
+
+    async def _make_api_call_with_retry(self, api_params: Dict[str, Any]):
+        """
+        Make API call with exponential backoff retry logic.
+
+        Args:
+            api_params: Parameters for the API call
+
+        Returns:
+            Response from the API
+
+        Raises:
+            APIError: After all retries are exhausted
+        """
+        last_exception = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Per-attempt timeout bounds tail latency - a hung call is
+                # abandoned and retried on what is usually a fast path.
+                # The timeout grows mildly per retry so legitimately slow
+                # completions aren't starved on the final attempt
+                return await asyncio.wait_for(
+                    self.client.messages.create(**api_params),
+                    timeout=self.request_timeout * (1.5**attempt),
+                )
+
+            except (OverloadedError, RateLimitError, asyncio.TimeoutError) as e:
+                last_exception = e
+                if attempt == self.max_retries:
+                    # Final attempt failed
+                    logger.error(
+                        "API call failed after %d attempts: %s",
+                        self.max_retries + 1,
+                        e,
+                    )
+                    raise
+
+                # Prefer the server's retry hint over pure exponential
+                # backoff - it avoids both premature retries and needlessly
+                # long sleeps during overload events
+                server_hint = self._get_retry_after_hint(e)
+                delay = self.retry_delay * (2**attempt)
+                if server_hint is not None:
+                    delay = max(server_hint, delay)
+                # Keep +/-20% jitter so parallel workers don't unblock at once
+                delay = min(delay, self.max_retry_delay) * random.uniform(0.8, 1.2)
+
+                logger.warning(
+                    "API retry: attempt=%d/%d server_hint=%s effective_delay=%.2fs error=%s",
+                    attempt + 1,
+                    self.max_retries + 1,
+                    server_hint,
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+
+            except APIError as e:
+                # For other API errors, don't retry
+                logger.error("Non-retryable API error: %s", e)
+                raise
+
+            except Exception as e:
+                # For unexpected errors, don't retry
+                logger.error("Unexpected error in API call: %s", e)
+                raise
+
+        # This shouldn't be reached, but just in case
+        if last_exception:
+            raise last_exception
@@ -2,26 +2,47 @@ import warnings
 
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
+import asyncio
+import atexit
 import logging
 import os
+import queue
 import traceback
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Optional, Union
 
 from config import config
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import FileResponse
+import orjson
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from rag_system import RAGSystem
-
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+from pydantic import BaseModel, ConfigDict
+from rag_system import RAGSystem, is_error_response
+from semantic_cache import LLMSemanticCache
+from session_manager import SessionPool
+
+# Configure logging for debugging. Records go through an in-memory queue
+# and are written by a listener thread, so log I/O never blocks the event
+# loop or serializes workers on the stdout lock during failure storms
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logging.basicConfig(level=logging.DEBUG, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(
+    _log_queue, logging.StreamHandler(), respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app with debug mode
-app = FastAPI(title="Course Materials RAG System", root_path="", debug=True)
+# orjson serializes responses several times faster than stdlib json
+app = FastAPI(
+    title="Course Materials RAG System",
+    root_path="",
+    debug=True,
+    default_response_class=ORJSONResponse,
+)
 
 # Add trusted host middleware for proxy
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
@@ -39,11 +60,30 @@ app.add_middleware(
 # Initialize RAG system
 rag_system = RAGSystem(config)
 
+# Semantic response cache - answers are deterministic (temperature=0), so
+# paraphrased repeat queries can be served without an LLM call
+semantic_cache = LLMSemanticCache(
+    rag_system.vector_store.embedding_function,
+    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+    ttl=config.SEMANTIC_CACHE_TTL,
+    max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+# Pool of pre-minted session IDs for anonymous queries
+session_pool = SessionPool(rag_system.session_manager)
+
+
+# Pydantic models for request/response. Frozen models with extra="forbid"
+# skip per-instance mutability bookkeeping and unknown-field handling,
+# trimming validator work on every request under high RPS
+_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
 
-# Pydantic models for request/response
 class QueryRequest(BaseModel):
     """Request model for course queries"""
 
+    model_config = _MODEL_CONFIG
+
     query: str
     session_id: Optional[str] = None
 
@@ -51,6 +91,8 @@ class QueryRequest(BaseModel):
 class SourceItem(BaseModel):
     """Model for individual source items that can be either text or clickable links"""
 
+    model_config = _MODEL_CONFIG
+
     text: str
     url: Optional[str] = None
 
@@ -58,34 +100,85 @@ class SourceItem(BaseModel):
 class QueryResponse(BaseModel):
     """Response model for course queries"""
 
+    model_config = _MODEL_CONFIG
+
     answer: str
-    sources: List[Union[str, SourceItem]]  # Support both legacy strings and new objects
+    # Tuple keeps the frozen model deeply immutable; supports both legacy
+    # strings and new objects
+    sources: tuple[Union[str, SourceItem], ...]
     session_id: str
 
 
 class CourseStats(BaseModel):
     """Response model for course statistics"""
 
+    model_config = _MODEL_CONFIG
+
     total_courses: int
     course_titles: List[str]
 
 
+class BatchCall(BaseModel):
+    """One operation inside a batched request
+
+    input_from names an earlier call in the batch; its session_id is
+    forwarded so dependent queries share a session without a client round
+    trip in between.
+    """
+
+    model_config = _MODEL_CONFIG
+
+    op: str  # "query" or "courses"
+    payload: Optional[dict] = None
+    input_from: Optional[int] = None
+
+
+class BatchResponse(BaseModel):
+    """Ordered results for a batched request"""
+
+    model_config = _MODEL_CONFIG
+
+    results: tuple[Union[QueryResponse, CourseStats], ...]
+
+
 # API Endpoints
 
 
-@app.post("/api/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
-    """Process a query and return response with sources"""
+async def _process_query(request: QueryRequest) -> QueryResponse:
+    """Shared query pipeline behind /api/query and /api/batch"""
     try:
         logger.info(f"Processing query: {request.query}")
 
-        # Create session if not provided
+        # Take a preallocated session ID if none provided
         session_id = request.session_id
         if not session_id:
-            session_id = rag_system.session_manager.create_session()
+            session_id = await session_pool.acquire()
+
+        # Check the semantic cache first; skip it for sessions with history
+        # since those answers depend on conversation context. Cache lookups
+        # embed the query with sentence-transformers, so they run in a
+        # worker thread to keep the event loop free
+        history = rag_system.session_manager.get_conversation_history(session_id)
+        if history is None:
+            cached = await asyncio.to_thread(semantic_cache.get, request.query)
+            if cached is not None:
+                answer, sources = cached
+                logger.info(f"Semantic cache hit for query: {request.query}")
+                rag_system.session_manager.add_exchange(
+                    session_id, request.query, answer
+                )
+                return QueryResponse(
+                    answer=answer, sources=sources, session_id=session_id
+                )
 
         # Process query using RAG system (handles API errors gracefully)
-        answer, sources = rag_system.query(request.query, session_id)
+        answer, sources = await rag_system.query(request.query, session_id)
+
+        # Never cache a graceful error answer: during an overload storm it
+        # would otherwise serve the apology to paraphrased queries for the
+        # whole cache TTL after the API recovers
+        if history is None and not is_error_response(answer):
+            await asyncio.to_thread(semantic_cache.put, request.query, answer, sources)
 
         logger.info(
             f"Query processed successfully. Sources type: {type(sources)}, Sources: {sources}"
@@ -106,6 +199,94 @@ async def query_documents(request: QueryRequest):
         )
 
 
+@app.post("/api/query", response_model=QueryResponse)
+async def query_documents(request: QueryRequest):
+    """Process a query and return response with sources"""
+    return await _process_query(request)
+
+
+@app.post("/api/batch", response_model=BatchResponse)
+async def batch_requests(calls: List[BatchCall]):
+    """Execute several API operations in one round trip
+
+    Calls are grouped into dependency layers by input_from; each layer runs
+    concurrently and dependent queries inherit the session_id of the call
+    they reference, so a stats fetch plus a query/follow-up chain costs one
+    request instead of three.
+    """
+    # Assign each call a layer: independent calls run first, each dependent
+    # call one layer after the call it references
+    depths: List[int] = []
+    for i, batch_call in enumerate(calls):
+        if batch_call.input_from is None:
+            depths.append(0)
+        elif 0 <= batch_call.input_from < i:
+            depths.append(depths[batch_call.input_from] + 1)
+        else:
+            raise HTTPException(
+                status_code=400, detail="input_from must reference an earlier call"
+            )
+
+    results: List[Union[QueryResponse, CourseStats, None]] = [None] * len(calls)
+
+    async def run_call(index: int, batch_call: BatchCall):
+        if batch_call.op == "query":
+            payload = dict(batch_call.payload or {})
+            if batch_call.input_from is not None:
+                prior = results[batch_call.input_from]
+                if isinstance(prior, QueryResponse):
+                    payload.setdefault("session_id", prior.session_id)
+            results[index] = await _process_query(QueryRequest(**payload))
+        elif batch_call.op == "courses":
+            results[index] = await get_course_stats()
+        else:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown batch op: {batch_call.op}"
+            )
+
+    for depth in range(max(depths, default=-1) + 1):
+        await asyncio.gather(
+            *(
+                run_call(i, batch_call)
+                for i, batch_call in enumerate(calls)
+                if depths[i] == depth
+            )
+        )
+
+    return BatchResponse(results=results)
+
+
+@app.post("/api/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """Stream a query response as newline-delimited JSON events
+
+    Emits {"delta": text} chunks as the answer is generated, then
+    {"sources": [...]} and a terminal {"done": true, "session_id": ...},
+    so the frontend can render tokens as they arrive instead of waiting
+    for the full completion.
+    """
+    logger.info(f"Processing streaming query: {request.query}")
+
+    session_id = request.session_id
+    if not session_id:
+        session_id = await session_pool.acquire()
+
+    async def event_stream():
+        try:
+            async for event in rag_system.query_stream(request.query, session_id):
+                yield orjson.dumps(event) + b"\n"
+        except Exception as e:
+            logger.error(f"Unexpected error in streaming layer: {str(e)}")
+            yield orjson.dumps(
+                {"delta": "I encountered an unexpected system error. Please try again."}
+            ) + b"\n"
+        yield orjson.dumps({"done": True, "session_id": session_id}) + b"\n"
+
+    # Newline-delimited JSON, not SSE - declare the matching media type so
+    # consumers parse the body as NDJSON rather than expecting data: frames
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 @app.get("/api/courses", response_model=CourseStats)
 async def get_course_stats():
     """Get course analytics and statistics"""
@@ -122,6 +303,12 @@ async def get_course_stats():
 @app.on_event("startup")
 async def startup_event():
     """Load initial documents on startup"""
+    # Warm up the Anthropic connection pool before the first user arrives
+    await rag_system.ai_generator.warm_up_connection()
+
+    # Start topping up the session ID pool in the background
+    session_pool.start()
+
     docs_path = "../docs"
     if os.path.exists(docs_path):
         print("Loading initial documents...")
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBatcher:
+    """Micro-batches concurrent independent queries into single LLM calls
+
+    Because generation runs at temperature=0 with an identical system
+    prompt, several pending questions can share one request: up to
+    max_batch queries that arrive within a short window are combined into
+    a numbered multi-question prompt, answered as a JSON array, and the
+    answers are distributed back to the waiting callers. This amortizes
+    the system-prompt processing and round-trip cost across the batch.
+
+    A lone query in the window takes the direct single-call path, so
+    batching is latency-neutral when there is no concurrency. Only use
+    this for queries answered without tools - tool_use responses cannot
+    be demultiplexed across questions.
+    """
+
+    BATCH_PROMPT_HEADER = (
+        "Answer each numbered question independently. Respond with only a "
+        "JSON array of answer strings, one per question, in order:\n"
+    )
+
+    def __init__(
+        self,
+        generate_fn: Callable[[str], Awaitable[str]],
+        max_batch: int = 8,
+        window_ms: float = 10.0,
+    ):
+        self.generate_fn = generate_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._collector_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background collector (call from an event loop)"""
+        if self._collector_task is None:
+            self._collector_task = asyncio.create_task(self._collect())
+
+    def stop(self):
+        """Cancel the background collector"""
+        if self._collector_task is not None:
+            self._collector_task.cancel()
+            self._collector_task = None
+
+    async def submit(self, query: str) -> str:
+        """Submit a query and wait for its (possibly batched) answer"""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, future))
+        return await future
+
+    async def _collect(self):
+        """Group queued queries that arrive within the batching window"""
+        while True:
+            batch = [await self.queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without blocking collection of the next batch
+            asyncio.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Answer a batch with one LLM call, falling back to singles on failure"""
+        if len(batch) == 1:
+            query, future = batch[0]
+            try:
+                result = await self.generate_fn(query)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        prompt = self.BATCH_PROMPT_HEADER + "\n".join(
+            f"{i}. {query}" for i, (query, _) in enumerate(batch, start=1)
+        )
+
+        try:
+            raw = await self.generate_fn(prompt)
+            answers = self._parse_answers(raw, expected=len(batch))
+        except Exception as e:
+            # Batched call failed or couldn't be demultiplexed - answer
+            # each query individually so no caller is starved
+            logger.warning("Batched LLM call failed, retrying individually: %s", e)
+            await asyncio.gather(*[self._run_batch([item]) for item in batch])
+            return
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+    @staticmethod
+    def _parse_answers(raw: str, expected: int) -> List[str]:
+        """Parse the model's JSON array response into per-query answers"""
+        # Tolerate a markdown code fence or prose around the array
+        match = re.search(r"\[.*\]", raw, re.DOTALL)
+        if match is None:
+            raise ValueError(f"No JSON array in batched response: {raw[:100]}")
+
+        answers = json.loads(match.group(0))
+        if not isinstance(answers, list) or len(answers) != expected:
+            raise ValueError(
+                f"Expected {expected} answers, got: {type(answers).__name__} "
+                f"of length {len(answers) if isinstance(answers, list) else 'n/a'}"
+            )
+        return [str(answer) for answer in answers]
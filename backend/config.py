@@ -1,13 +1,15 @@
 import os
 from dataclasses import dataclass
 
-from dotenv import load_dotenv
+# Load environment variables from .env file; containerized deployments
+# inject env vars directly and can skip the per-worker .env disk parse
+if not os.getenv("RAG_SKIP_DOTENV"):
+    from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+    load_dotenv()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     """Configuration settings for the RAG system"""
 
@@ -27,12 +29,21 @@ class Config:
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
 
+    # Semantic response cache settings
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # Min cosine similarity for a cache hit
+    SEMANTIC_CACHE_TTL: int = 3600  # Seconds before cached answers expire
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 512  # Cached answers kept before evicting oldest
+
     # API retry settings
+    REQUEST_TIMEOUT: float = 20.0  # Per-attempt LLM request timeout (seconds)
     MAX_RETRIES: int = 3  # Maximum number of API retries
     RETRY_DELAY: float = 1.0  # Base delay between retries (seconds)
     MAX_RETRY_DELAY: float = 60.0  # Maximum delay between retries
 
     def __post_init__(self):
+        self._validate()
+
+    def _validate(self):
         """Validate configuration values"""
         if not self.ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY is required")
@@ -1,11 +1,14 @@
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Lesson(BaseModel):
     """Represents a lesson within a course"""
 
+    # Frozen: instances are shared freely (e.g. across test fixtures)
+    model_config = ConfigDict(frozen=True)
+
     lesson_number: int  # Sequential lesson number (1, 2, 3, etc.)
     title: str  # Lesson title
     lesson_link: Optional[str] = None  # URL link to the lesson
@@ -14,6 +17,10 @@ class Lesson(BaseModel):
 class Course(BaseModel):
     """Represents a complete course with its lessons"""
 
+    # Frozen blocks field reassignment; the lessons list itself is still
+    # appended to during document processing
+    model_config = ConfigDict(frozen=True)
+
     title: str  # Full course title (used as unique identifier)
     course_link: Optional[str] = None  # URL link to the course
     instructor: Optional[str] = None  # Course instructor name (optional metadata)
@@ -23,6 +30,8 @@ class Course(BaseModel):
 class CourseChunk(BaseModel):
     """Represents a text chunk from a course for vector storage"""
 
+    model_config = ConfigDict(frozen=True)
+
     content: str  # The actual text content
     course_title: str  # Which course this chunk belongs to
     lesson_number: Optional[int] = None  # Which lesson this chunk is from
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import os
 from typing import Dict, List, Optional, Tuple, Union
 
@@ -10,6 +12,42 @@ from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from session_manager import SessionManager
 from vector_store import VectorStore
 
+logger = logging.getLogger(__name__)
+
+# Canned graceful answers for failed queries. Module-level so the web layer
+# can recognize an error answer (is_error_response) - e.g. to avoid caching
+# an apology for the lifetime of the semantic-cache TTL
+OVERLOADED_MESSAGE = (
+    "I'm experiencing high demand right now and the AI service is temporarily overloaded. "
+    "Please try your question again in a few moments. If the issue persists, the service "
+    "may be experiencing temporary capacity constraints."
+)
+API_ERROR_MESSAGE = (
+    "I'm sorry, but I'm having trouble connecting to the AI service right now. "
+    "Please check your configuration or try again later."
+)
+UNEXPECTED_ERROR_MESSAGE = (
+    "I encountered an unexpected error while processing your question. "
+    "Please try again, and if the problem persists, please check the system logs."
+)
+_ERROR_MESSAGES = frozenset(
+    {OVERLOADED_MESSAGE, API_ERROR_MESSAGE, UNEXPECTED_ERROR_MESSAGE}
+)
+
+# The AI generator degrades most failures internally instead of raising,
+# returning "I encountered an error while <phase>: <exception>" strings;
+# those carry variable exception text, so they are matched by prefix
+_GENERATOR_ERROR_PREFIX = "I encountered an error while"
+
+
+def is_error_response(answer: str) -> bool:
+    """Return True if an answer is a graceful error message, not a real answer
+
+    Covers both this module's canned messages and the AI generator's
+    degraded "I encountered an error while ..." answers.
+    """
+    return answer in _ERROR_MESSAGES or answer.startswith(_GENERATOR_ERROR_PREFIX)
+
 
 class RAGSystem:
     """Main orchestrator for the Retrieval-Augmented Generation system"""
@@ -30,6 +68,7 @@ class RAGSystem:
             config.MAX_RETRIES,
             config.RETRY_DELAY,
             config.MAX_RETRY_DELAY,
+            config.REQUEST_TIMEOUT,
         )
         self.session_manager = SessionManager(config.MAX_HISTORY)
 
@@ -125,7 +164,7 @@ class RAGSystem:
 
         return total_courses, total_chunks
 
-    def query(
+    async def query(
         self, query: str, session_id: Optional[str] = None
     ) -> Tuple[str, List[Union[str, Dict]]]:
         """
@@ -141,44 +180,40 @@ class RAGSystem:
         # Create prompt for the AI with clear instructions
         prompt = f"""Answer this question about course materials: {query}"""
 
-        # Get conversation history if session exists
-        history = None
+        # Fetch conversation history concurrently with tool-definition
+        # assembly - neither depends on the other, so they overlap off the
+        # event loop before the LLM critical path starts
         if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
+            history, tool_definitions = await asyncio.gather(
+                asyncio.to_thread(
+                    self.session_manager.get_conversation_history, session_id
+                ),
+                asyncio.to_thread(self.tool_manager.get_tool_definitions),
+            )
+        else:
+            history = None
+            tool_definitions = self.tool_manager.get_tool_definitions()
 
         # Generate response using AI with tools - handle API failures gracefully
         try:
-            response = self.ai_generator.generate_response(
+            response = await self.ai_generator.generate_response(
                 query=prompt,
                 conversation_history=history,
-                tools=self.tool_manager.get_tool_definitions(),
+                tools=tool_definitions,
                 tool_manager=self.tool_manager,
             )
         except (OverloadedError, RateLimitError) as e:
             # Handle API overload/rate limit errors gracefully
-            error_response = (
-                "I'm experiencing high demand right now and the AI service is temporarily overloaded. "
-                "Please try your question again in a few moments. If the issue persists, the service "
-                "may be experiencing temporary capacity constraints."
-            )
-            print(f"API overload/rate limit error handled gracefully: {e}")
-            return error_response, []
+            logger.warning("API overload/rate limit error handled gracefully: %s", e)
+            return OVERLOADED_MESSAGE, []
         except APIError as e:
             # Handle other API errors (authentication, etc.)
-            error_response = (
-                "I'm sorry, but I'm having trouble connecting to the AI service right now. "
-                "Please check your configuration or try again later."
-            )
-            print(f"API error handled gracefully: {e}")
-            return error_response, []
+            logger.warning("API error handled gracefully: %s", e)
+            return API_ERROR_MESSAGE, []
         except Exception as e:
             # Handle any other unexpected errors
-            error_response = (
-                "I encountered an unexpected error while processing your question. "
-                "Please try again, and if the problem persists, please check the system logs."
-            )
-            print(f"Unexpected error in RAG system: {e}")
-            return error_response, []
+            logger.error("Unexpected error in RAG system: %s", e)
+            return UNEXPECTED_ERROR_MESSAGE, []
 
         # Get sources from the search tool
         sources = self.tool_manager.get_last_sources()
@@ -193,6 +228,64 @@ class RAGSystem:
         # Return response with sources from tool searches
         return response, sources
 
+    async def query_stream(self, query: str, session_id: Optional[str] = None):
+        """
+        Process a user query, streaming the answer as it is generated.
+
+        Yields dict events: {"delta": text} chunks while the answer streams,
+        then a final {"sources": [...]} once generation completes. Session
+        history is updated with the assembled answer at the end.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        history = (
+            self.session_manager.get_conversation_history(session_id)
+            if session_id
+            else None
+        )
+
+        answer_parts: List[str] = []
+        try:
+            async for text in self.ai_generator.generate_response_stream(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self.tool_manager,
+            ):
+                answer_parts.append(text)
+                yield {"delta": text}
+        except (OverloadedError, RateLimitError) as e:
+            logger.warning("API overload/rate limit error handled gracefully: %s", e)
+            yield {
+                "delta": (
+                    "I'm experiencing high demand right now and the AI service is temporarily overloaded. "
+                    "Please try your question again in a few moments."
+                )
+            }
+            yield {"sources": []}
+            return
+        except APIError as e:
+            logger.warning("API error handled gracefully: %s", e)
+            yield {
+                "delta": (
+                    "I'm sorry, but I'm having trouble connecting to the AI service right now. "
+                    "Please check your configuration or try again later."
+                )
+            }
+            yield {"sources": []}
+            return
+
+        sources = self.tool_manager.get_last_sources()
+        self.tool_manager.reset_sources()
+        yield {"sources": sources}
+
+        if session_id:
+            self.session_manager.add_exchange(session_id, query, "".join(answer_parts))
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
@@ -218,6 +218,7 @@ class ToolManager:
 
     def __init__(self):
         self.tools = {}
+        self._defs_cache = None
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -226,10 +227,19 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._defs_cache = None
 
     def get_tool_definitions(self) -> list:
-        """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        """Get all tool definitions for Anthropic tool calling
+
+        The definitions are static schemas, so the assembled list is memoized
+        until the tool set changes; callers treat it as read-only.
+        """
+        if self._defs_cache is None:
+            self._defs_cache = [
+                tool.get_tool_definition() for tool in self.tools.values()
+            ]
+        return self._defs_cache
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
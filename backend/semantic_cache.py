@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+class LLMSemanticCache:
+    """Embedding-based cache for deterministic (temperature=0) LLM answers
+
+    Stores L2-normalized query embeddings in a single float32 matrix so a
+    lookup is one matrix-vector product plus argmax. Paraphrased queries
+    ("What lessons are in X?" vs "Show me the outline for X") land above the
+    similarity threshold and return the cached answer with zero LLM cost.
+
+    The cache is bounded: expired rows are pruned on every access and at
+    most max_entries recent answers are kept, evicting the oldest first.
+    get/put are called from worker threads, so the embeddings/entries pair
+    is guarded by a lock; only the embedding call itself runs outside it.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Any],
+        threshold: float = 0.92,
+        ttl: int = 3600,
+        max_entries: int = 512,
+    ):
+        """
+        Args:
+            embed_fn: Callable mapping a list of texts to embeddings
+                      (e.g. the vector store's sentence-transformer function)
+            threshold: Minimum cosine similarity for a cache hit
+            ttl: Seconds before a cached entry expires
+            max_entries: Maximum number of cached answers to keep
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # Normalized query embeddings, shape [N, embedding_dim]
+        self._embeddings: Optional[np.ndarray] = None
+        # Parallel list of (answer, sources, expires_at)
+        self._entries: List[Tuple[str, List[Union[str, Dict]], float]] = []
+        self._lock = threading.Lock()
+
+    def _embed(self, query: str) -> np.ndarray:
+        """Embed and L2-normalize a query so dot product equals cosine similarity"""
+        vector = np.asarray(self.embed_fn([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _prune_expired(self, now: float):
+        """Drop expired rows from both structures; caller must hold the lock"""
+        keep = [
+            index
+            for index, (_, _, expires_at) in enumerate(self._entries)
+            if now < expires_at
+        ]
+        if len(keep) == len(self._entries):
+            return
+        if not keep:
+            self._embeddings = None
+            self._entries = []
+            return
+        self._embeddings = self._embeddings[keep]
+        self._entries = [self._entries[index] for index in keep]
+
+    def get(self, query: str) -> Optional[Tuple[str, List[Union[str, Dict]]]]:
+        """Return the cached (answer, sources) for a similar query, or None"""
+        if self._embeddings is None:
+            return None
+
+        # Embedding is the expensive part and touches no shared state
+        vector = self._embed(query)
+
+        with self._lock:
+            self._prune_expired(time.time())
+            if self._embeddings is None:
+                return None
+
+            similarities = self._embeddings @ vector
+            best_index = int(np.argmax(similarities))
+
+            if similarities[best_index] < self.threshold:
+                return None
+
+            answer, sources, _ = self._entries[best_index]
+            return answer, sources
+
+    def put(self, query: str, answer: str, sources: List[Union[str, Dict]]):
+        """Cache the (answer, sources) result for a query"""
+        vector = self._embed(query)[np.newaxis, :]
+
+        with self._lock:
+            now = time.time()
+            self._prune_expired(now)
+
+            if self._embeddings is None:
+                self._embeddings = vector
+            else:
+                self._embeddings = np.vstack([self._embeddings, vector])
+            self._entries.append((answer, sources, now + self.ttl))
+
+            # Evict the oldest entries beyond the cap
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._embeddings = self._embeddings[overflow:]
+                del self._entries[:overflow]
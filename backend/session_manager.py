@@ -1,3 +1,5 @@
+import asyncio
+import uuid
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
@@ -17,6 +19,9 @@ class SessionManager:
         self.max_history = max_history
         self.sessions: Dict[str, List[Message]] = {}
         self.session_counter = 0
+        # Formatted-history cache: histories are immutable between writes,
+        # so the joined string is rebuilt only after a message is added
+        self._formatted_history: Dict[str, str] = {}
 
     def create_session(self) -> str:
         """Create a new conversation session"""
@@ -39,6 +44,9 @@ class SessionManager:
                 -self.max_history * 2 :
             ]
 
+        # History changed - drop the cached formatted string
+        self._formatted_history.pop(session_id, None)
+
     def add_exchange(self, session_id: str, user_message: str, assistant_message: str):
         """Add a complete question-answer exchange"""
         self.add_message(session_id, "user", user_message)
@@ -53,14 +61,55 @@ class SessionManager:
         if not messages:
             return None
 
+        # Serve the cached formatted string when the history hasn't changed
+        cached = self._formatted_history.get(session_id)
+        if cached is not None:
+            return cached
+
         # Format messages for context
         formatted_messages = []
         for msg in messages:
             formatted_messages.append(f"{msg.role.title()}: {msg.content}")
 
-        return "\n".join(formatted_messages)
+        formatted = "\n".join(formatted_messages)
+        self._formatted_history[session_id] = formatted
+        return formatted
 
     def clear_session(self, session_id: str):
         """Clear all messages from a session"""
         if session_id in self.sessions:
             self.sessions[session_id] = []
+        self._formatted_history.pop(session_id, None)
+
+
+class SessionPool:
+    """Preallocates session IDs so anonymous queries skip synchronous creation
+
+    A background producer keeps a queue of pre-minted UUID session IDs
+    topped up; session state is materialized lazily on the first write
+    (add_message already handles unknown IDs).
+    """
+
+    def __init__(self, session_manager: SessionManager, size: int = 256):
+        self.session_manager = session_manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self._producer_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background producer (call from an event loop)"""
+        if self._producer_task is None:
+            self._producer_task = asyncio.create_task(self._fill())
+
+    async def _fill(self):
+        """Keep the queue topped up with pre-minted session IDs"""
+        while True:
+            # put() blocks once the queue is full, so this idles cheaply
+            await self.queue.put(f"session_{uuid.uuid4().hex}")
+
+    async def acquire(self) -> str:
+        """Get a preallocated session ID, falling back to direct creation"""
+        try:
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            # Cold start or producer not running yet
+            return self.session_manager.create_session()
@@ -1,114 +1,308 @@
+import functools
+import itertools
 import os
 import sys
 import tempfile
 import shutil
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
 from typing import Any, Dict, List, Optional
-from unittest.mock import MagicMock, Mock
+from unittest.mock import AsyncMock, MagicMock, Mock, create_autospec
 
 import pytest
 from fastapi.testclient import TestClient
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add parent directory to path for imports; guard so repeated conftest
+# loads (pytest-xdist workers, hot reloaders) don't stack duplicate entries
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_PARENT = os.path.dirname(_HERE)
+if _PARENT not in sys.path:
+    sys.path.insert(0, _PARENT)
 
 from ai_generator import AIGenerator
 from models import Course, CourseChunk, Lesson
-from rag_system import RAGSystem
 from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from vector_store import SearchResults, VectorStore
-from config import Config
 
 
-@pytest.fixture
-def mock_vector_store():
-    """Create a mock vector store with test data"""
-    mock_store = Mock(spec=VectorStore)
+# Canned vector store behavior, built once at import. Dispatch goes through
+# frozen dicts (one hash lookup) instead of if/elif string-compare chains,
+# and the module-level functions avoid rebuilding closures per test
+
+# Shared SearchResults instances, allocated once at import. Tests only read
+# them, so the dispatcher hands out references instead of rebuilding the
+# object trees (and their list literals) on every search call
+# Tuples rather than lists: consumers only iterate/zip these fields, and
+# immutable sequences make the shared singletons tamper-proof end to end
+_EMPTY_RESULT = SearchResults(documents=(), metadata=(), distances=())
+_ERROR_RESULT = SearchResults(
+    documents=(), metadata=(), distances=(), error="Search failed"
+)
+_PYTHON_BASICS_RESULT = SearchResults(
+    documents=("Python is a programming language", "Variables in Python"),
+    metadata=(
+        MappingProxyType({"course_title": "Introduction to Python", "lesson_number": 1}),
+        MappingProxyType({"course_title": "Introduction to Python", "lesson_number": 2}),
+    ),
+    distances=(0.1, 0.2),
+)
+_MCP_SERVERS_RESULT = SearchResults(
+    documents=("MCP servers handle protocol connections",),
+    metadata=(
+        MappingProxyType(
+            {"course_title": "Model Context Protocol", "lesson_number": 3}
+        ),
+    ),
+    distances=(0.15,),
+)
+
+# Default case - check if this is being overridden by the specific test
+_DEFAULT_SEARCH_RESULT = SearchResults(
+    documents=("Default test content",),
+    metadata=(MappingProxyType({"course_title": "Test Course", "lesson_number": 1}),),
+    distances=(0.3,),
+)
+
+_SEARCH_TABLE = {
+    ("test_empty", None): _EMPTY_RESULT,
+    ("test_error", None): _ERROR_RESULT,
+    ("python basics", None): _PYTHON_BASICS_RESULT,
+    ("servers", "MCP"): _MCP_SERVERS_RESULT,
+}
+
+_COURSE_NAME_MAP = {
+    "MCP": "Model Context Protocol",
+    "Python": "Introduction to Python",
+    "nonexistent": None,
+}
+
+_LESSON_LINKS = {
+    ("Introduction to Python", 1): "https://example.com/python/lesson1",
+    ("Model Context Protocol", 3): "https://example.com/mcp/lesson3",
+}
+
+# Read-only course metadata shared across the session: tuples instead of
+# lists and MappingProxyType around each dict, so any accidental mutation
+# in one test raises immediately instead of corrupting later tests
+_COURSES_METADATA = (
+    MappingProxyType(
+        {
+            "title": "Introduction to Python",
+            "course_link": "https://example.com/python",
+            "lessons": (
+                MappingProxyType({"lesson_number": 1, "lesson_title": "Python Basics"}),
+                MappingProxyType(
+                    {"lesson_number": 2, "lesson_title": "Variables and Data Types"}
+                ),
+            ),
+        }
+    ),
+    MappingProxyType(
+        {
+            "title": "Model Context Protocol",
+            "course_link": "https://example.com/mcp",
+            "lessons": (
+                MappingProxyType(
+                    {"lesson_number": 1, "lesson_title": "Introduction to MCP"}
+                ),
+                MappingProxyType(
+                    {"lesson_number": 2, "lesson_title": "MCP Architecture"}
+                ),
+                MappingProxyType({"lesson_number": 3, "lesson_title": "MCP Servers"}),
+            ),
+        }
+    ),
+)
+
+
+def _mock_search(
+    query: str,
+    course_name: Optional[str] = None,
+    lesson_number: Optional[int] = None,
+):
+    """Simulate different search scenarios via the dispatch table"""
+    result = _SEARCH_TABLE.get((query, course_name))
+    if result is None:
+        # Query-only entries match regardless of the course filter
+        result = _SEARCH_TABLE.get((query, None), _DEFAULT_SEARCH_RESULT)
+    return result
+
+
+# Pure lookups over tiny tables - memoized so repeated resolutions of the
+# same arguments return a cached reference without re-entering the function
+@functools.lru_cache(maxsize=None)
+def _mock_resolve_course_name(course_name: str):
+    return _COURSE_NAME_MAP.get(course_name, "Test Course")
 
-    # Mock search results for testing
-    def mock_search(
+
+@functools.lru_cache(maxsize=None)
+def _mock_get_lesson_link(course_title: str, lesson_number: int):
+    return _LESSON_LINKS.get((course_title, lesson_number))
+
+
+class FakeVectorStore:
+    """Hand-written vector store stub with real methods
+
+    Every call through a Mock pays several layers of _mock_call dispatch
+    and call-record bookkeeping; search-heavy tests make thousands of such
+    calls. Plain methods reduce that to normal Python calls. Arguments are
+    recorded in search_calls for tests that assert on how the store was
+    queried. Tests that need side_effect/return_value overrides use the
+    Mock-based spy_vector_store instead.
+    """
+
+    __slots__ = ("search_calls",)
+
+    def __init__(self):
+        self.search_calls: List[tuple] = []
+
+    def search(
+        self,
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
     ):
-        # Simulate different search scenarios
-        if query == "test_empty":
-            return SearchResults(documents=[], metadata=[], distances=[])
-        elif query == "test_error":
-            return SearchResults(
-                documents=[], metadata=[], distances=[], error="Search failed"
-            )
-        elif query == "python basics":
-            return SearchResults(
-                documents=["Python is a programming language", "Variables in Python"],
-                metadata=[
-                    {"course_title": "Introduction to Python", "lesson_number": 1},
-                    {"course_title": "Introduction to Python", "lesson_number": 2},
-                ],
-                distances=[0.1, 0.2],
-            )
-        elif course_name == "MCP" and query == "servers":
-            return SearchResults(
-                documents=["MCP servers handle protocol connections"],
-                metadata=[
-                    {"course_title": "Model Context Protocol", "lesson_number": 3}
-                ],
-                distances=[0.15],
-            )
-        else:
-            # Default case - check if this is being overridden by the specific test
-            return SearchResults(
-                documents=["Default test content"],
-                metadata=[{"course_title": "Test Course", "lesson_number": 1}],
-                distances=[0.3],
-            )
-
-    mock_store.search.side_effect = mock_search
-
-    # Mock course resolution
-    def mock_resolve_course_name(course_name: str):
-        mapping = {
-            "MCP": "Model Context Protocol",
-            "Python": "Introduction to Python",
-            "nonexistent": None,
-        }
-        return mapping.get(course_name, "Test Course")
+        self.search_calls.append((query, course_name, lesson_number))
+        return _mock_search(query, course_name, lesson_number)
 
-    mock_store._resolve_course_name.side_effect = mock_resolve_course_name
+    def _resolve_course_name(self, course_name: str):
+        return _mock_resolve_course_name(course_name)
 
-    # Mock lesson link retrieval
-    def mock_get_lesson_link(course_title: str, lesson_number: int):
-        if course_title == "Introduction to Python" and lesson_number == 1:
-            return "https://example.com/python/lesson1"
-        elif course_title == "Model Context Protocol" and lesson_number == 3:
-            return "https://example.com/mcp/lesson3"
-        return None
+    def get_lesson_link(self, course_title: str, lesson_number: int):
+        return _mock_get_lesson_link(course_title, lesson_number)
 
-    mock_store.get_lesson_link.side_effect = mock_get_lesson_link
+    def get_all_courses_metadata(self):
+        return _COURSES_METADATA
 
-    # Mock course metadata
-    mock_store.get_all_courses_metadata.return_value = [
-        {
-            "title": "Introduction to Python",
-            "course_link": "https://example.com/python",
-            "lessons": [
-                {"lesson_number": 1, "lesson_title": "Python Basics"},
-                {"lesson_number": 2, "lesson_title": "Variables and Data Types"},
-            ],
-        },
-        {
-            "title": "Model Context Protocol",
-            "course_link": "https://example.com/mcp",
-            "lessons": [
-                {"lesson_number": 1, "lesson_title": "Introduction to MCP"},
-                {"lesson_number": 2, "lesson_title": "MCP Architecture"},
-                {"lesson_number": 3, "lesson_title": "MCP Servers"},
-            ],
-        },
-    ]
+
+@pytest.fixture
+def mock_vector_store():
+    """Create a fake vector store with test data"""
+    return FakeVectorStore()
+
+
+@pytest.fixture(scope="session")
+def _spy_vector_store_session():
+    """Build the autospecced store once - spec introspection is costly
+
+    create_autospec additionally validates call signatures against the
+    real VectorStore, so a drifted method signature fails loudly here
+    instead of silently passing against a permissive Mock.
+    """
+    return create_autospec(VectorStore, instance=True)
+
+
+@pytest.fixture
+def spy_vector_store(_spy_vector_store_session):
+    """Create a Mock-based vector store for tests that override behavior
+
+    The underlying Mock is session-scoped; per test this only clears call
+    records and re-wires the canned behavior, so per-test overrides of
+    side_effect/return_value never leak into the next test.
+    """
+    mock_store = _spy_vector_store_session
+    mock_store.reset_mock()
+
+    mock_store.search.side_effect = _mock_search
+    mock_store.search.return_value = None
+    mock_store._resolve_course_name.side_effect = _mock_resolve_course_name
+    mock_store.get_lesson_link.side_effect = _mock_get_lesson_link
+    mock_store.get_lesson_link.return_value = None
+    mock_store.get_all_courses_metadata.side_effect = None
+    mock_store.get_all_courses_metadata.return_value = _COURSES_METADATA
 
     return mock_store
 
 
+@pytest.fixture
+def _vs_skeleton(_spy_vector_store_session):
+    """Provide the shared spy shell with all previous wiring cleared"""
+    mock_store = _spy_vector_store_session
+    # Recursive reset also clears side_effect/return_value on child mocks
+    mock_store.reset_mock(return_value=True, side_effect=True)
+    return mock_store
+
+
+@pytest.fixture
+def vs_with_search(_vs_skeleton):
+    """Create a store with only search behavior wired
+
+    Narrow Mock-based fixture for tests that never touch metadata or
+    resolution - unwired methods return bare child Mocks, so reaching for
+    them unexpectedly shows up as an obviously-wrong value.
+    """
+    _vs_skeleton.search.side_effect = _mock_search
+    _vs_skeleton.get_lesson_link.side_effect = _mock_get_lesson_link
+    return _vs_skeleton
+
+
+@pytest.fixture
+def vs_with_metadata(_vs_skeleton):
+    """Create a store with only outline behavior (metadata + resolution) wired"""
+    _vs_skeleton._resolve_course_name.side_effect = _mock_resolve_course_name
+    _vs_skeleton.get_all_courses_metadata.return_value = _COURSES_METADATA
+    return _vs_skeleton
+
+
+@pytest.fixture
+def full_vector_store(mock_vector_store):
+    """Alias for the fully-wired store, for tests that exercise everything"""
+    return mock_vector_store
+
+
+# Named search scenarios for indirect parametrization
+_SCENARIO_RESULTS = {
+    "empty": _EMPTY_RESULT,
+    "error": _ERROR_RESULT,
+    "python_basics": _PYTHON_BASICS_RESULT,
+    "mcp_servers": _MCP_SERVERS_RESULT,
+    "default": _DEFAULT_SEARCH_RESULT,
+}
+
+
+@pytest.fixture
+def scenario_vector_store(request, _spy_vector_store_session):
+    """Create a store pinned to one named search scenario
+
+    Used with indirect parametrization, e.g.
+    @pytest.mark.parametrize("scenario_vector_store", ["empty"], indirect=True).
+    search uses a plain return_value - Mock's fastest dispatch path - so the
+    per-call scenario branching disappears entirely for these tests.
+    """
+    mock_store = _spy_vector_store_session
+    mock_store.reset_mock()
+
+    mock_store.search.side_effect = None
+    mock_store.search.return_value = _SCENARIO_RESULTS[request.param]
+    mock_store._resolve_course_name.side_effect = _mock_resolve_course_name
+    mock_store.get_lesson_link.side_effect = _mock_get_lesson_link
+    mock_store.get_all_courses_metadata.side_effect = None
+    mock_store.get_all_courses_metadata.return_value = _COURSES_METADATA
+
+    return mock_store
+
+
+@pytest.fixture
+def reset_mocks(_spy_vector_store_session, _mock_anthropic_client_session):
+    """Opt-in post-test reset of the shared session-scoped mock shells
+
+    The default fixtures already re-wire canned behavior on setup, so most
+    tests need nothing extra. Tests that leave unusual state on the shared
+    shells (e.g. configuring attributes outside the wired methods) can add
+    this fixture to guarantee a full reset when they finish.
+    """
+    yield
+    _spy_vector_store_session.reset_mock(return_value=True, side_effect=True)
+    _mock_anthropic_client_session.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def bare_vector_store():
+    """Create an unspecced Mock for tests that need neither canned data
+    nor signature checking - the cheapest store stand-in available"""
+    return Mock()
+
+
 @pytest.fixture
 def course_search_tool(mock_vector_store):
     """Create a CourseSearchTool with mocked vector store"""
@@ -121,66 +315,136 @@ def course_outline_tool(mock_vector_store):
     return CourseOutlineTool(mock_vector_store)
 
 
+# Canned Anthropic responses, built once as frozen slotted dataclasses.
+# Tests only read .stop_reason / .content[i] attributes, so a shared
+# immutable response tree avoids allocating a fresh Mock tree on every
+# call, and slots skip the per-instance __dict__ entirely
+
+
+@dataclass(frozen=True, slots=True)
+class _ToolUseBlock:
+    type: str
+    name: str
+    input: dict
+    id: str
+
+
+@dataclass(frozen=True, slots=True)
+class _TextBlock:
+    type: str
+    text: str
+
+
+@dataclass(frozen=True, slots=True)
+class _CannedResponse:
+    stop_reason: str
+    content: tuple
+
+
+_TOOL_USE_RESPONSE = _CannedResponse(
+    stop_reason="tool_use",
+    content=(
+        _ToolUseBlock(
+            type="tool_use",
+            name="search_course_content",
+            input={"query": "test query"},
+            id="tool_use_123",
+        ),
+    ),
+)
+
+_TEXT_RESPONSE = _CannedResponse(
+    stop_reason="end_turn",
+    content=(
+        _TextBlock(
+            type="text",
+            text="This is the AI response based on the search results.",
+        ),
+    ),
+)
+
+
+def _mock_create(**kwargs):
+    """Canned Anthropic responses: tool use when tools are offered, else text"""
+    return _TOOL_USE_RESPONSE if "tools" in kwargs else _TEXT_RESPONSE
+
+
+@pytest.fixture(scope="session")
+def _mock_anthropic_client_session():
+    """Build the client mock graph once per session
+
+    The real client is AsyncAnthropic, so create is an AsyncMock with the
+    canned responses as its default behavior.
+    """
+    client = Mock()
+    client.messages.create = AsyncMock(side_effect=_mock_create)
+    return client
+
+
 @pytest.fixture
-def mock_anthropic_client():
-    """Create a mock Anthropic client"""
-    mock_client = Mock()
-
-    # Mock responses for different scenarios
-    def mock_create(**kwargs):
-        mock_response = Mock()
-
-        # Check if tools are provided
-        if "tools" in kwargs:
-            # Simulate tool use response
-            mock_response.stop_reason = "tool_use"
-            mock_content_block = Mock()
-            mock_content_block.type = "tool_use"
-            mock_content_block.name = "search_course_content"
-            mock_content_block.input = {"query": "test query"}
-            mock_content_block.id = "tool_use_123"
-            mock_response.content = [mock_content_block]
-        else:
-            # Simulate regular text response
-            mock_response.stop_reason = "end_turn"
-            mock_text_block = Mock()
-            mock_text_block.text = (
-                "This is the AI response based on the search results."
-            )
-            mock_response.content = [mock_text_block]
-
-        return mock_response
-
-    mock_client.messages.create.side_effect = mock_create
-    return mock_client
+def mock_anthropic_client(_mock_anthropic_client_session):
+    """Create a mock Anthropic client
+
+    The whole mock graph is session-scoped; the finalizer resets call
+    records and per-test overrides so each test starts fresh without
+    rebuilding messages/create mocks every time.
+    """
+    mock_client = _mock_anthropic_client_session
+    messages = mock_client.messages
+    yield mock_client
+    messages.create.reset_mock(return_value=True, side_effect=True)
+    messages.create.side_effect = _mock_create
+    # Discard any per-test stream mock so the auto-created child returns
+    # (reset_mock leaves manually assigned attributes in place)
+    messages.__dict__.pop("stream", None)
+
+
+@pytest.fixture(scope="session")
+def _ai_generator_session():
+    """Construct the AIGenerator once - __init__ builds a real HTTP client
+
+    The generator holds no per-request state besides the client, so tests
+    can share one instance as long as the client mock is swapped per test.
+    """
+    return AIGenerator("test_api_key", "claude-3-sonnet-20240229")
 
 
 @pytest.fixture
-def mock_ai_generator(mock_anthropic_client):
+def mock_ai_generator(_ai_generator_session, mock_anthropic_client):
     """Create an AIGenerator with mocked Anthropic client"""
-    ai_gen = AIGenerator("test_api_key", "claude-3-sonnet-20240229")
-    ai_gen.client = mock_anthropic_client
-    return ai_gen
+    _ai_generator_session.client = mock_anthropic_client
+    return _ai_generator_session
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_config():
-    """Create a mock configuration object"""
-    config = Mock()
-    config.CHUNK_SIZE = 1000
-    config.CHUNK_OVERLAP = 200
-    config.CHROMA_PATH = "./test_chroma_db"
-    config.EMBEDDING_MODEL = "all-MiniLM-L6-v2"
-    config.MAX_RESULTS = 5
-    config.ANTHROPIC_API_KEY = "test_api_key"
-    config.ANTHROPIC_MODEL = "claude-3-sonnet-20240229"
-    config.MAX_HISTORY = 10
-    return config
+    """Create a test configuration object
+
+    A plain namespace - config is only read as a data bag, so none of
+    Mock's recording machinery is needed.
+    """
+    return SimpleNamespace(
+        CHUNK_SIZE=1000,
+        CHUNK_OVERLAP=200,
+        CHROMA_PATH="./test_chroma_db",
+        EMBEDDING_MODEL="all-MiniLM-L6-v2",
+        MAX_RESULTS=5,
+        ANTHROPIC_API_KEY="test_api_key",
+        ANTHROPIC_MODEL="claude-3-sonnet-20240229",
+        MAX_HISTORY=10,
+        SEMANTIC_CACHE_THRESHOLD=0.92,
+        SEMANTIC_CACHE_TTL=3600,
+        SEMANTIC_CACHE_MAX_ENTRIES=512,
+        REQUEST_TIMEOUT=20.0,
+        MAX_RETRIES=3,
+        RETRY_DELAY=1.0,
+        MAX_RETRY_DELAY=60.0,
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_course():
-    """Create a sample course for testing"""
+    """Create a sample course for testing (session-scoped - never mutated)"""
     return Course(
         title="Introduction to Python",
         course_link="https://example.com/python",
@@ -200,9 +464,9 @@ def sample_course():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_chunks():
-    """Create sample course chunks for testing"""
+    """Create sample course chunks for testing (session-scoped - never mutated)"""
     return [
         CourseChunk(
             content="Python is a high-level programming language",
@@ -219,9 +483,31 @@ def sample_chunks():
     ]
 
 
+@pytest.fixture
+def deterministic_ids(monkeypatch):
+    """Make uuid4 and random deterministic for tests that opt in
+
+    Session IDs and any randomized delays become reproducible, so tests
+    exercising ID-generating paths (e.g. SessionPool) can assert exact
+    values and memoize derived artifacts instead of recomputing them.
+    """
+    import random
+    import uuid
+
+    counter = itertools.count()
+    monkeypatch.setattr(uuid, "uuid4", lambda: uuid.UUID(int=next(counter)))
+    random.seed(0)
+    state = random.getstate()
+    yield
+    random.setstate(state)
+
+
 @pytest.fixture
 def test_config():
     """Create a test configuration with temporary directories"""
+    # Imported lazily so collecting tests that skip this fixture avoids it
+    from config import Config
+
     with tempfile.TemporaryDirectory() as temp_dir:
         config = Mock(spec=Config)
         config.CHUNK_SIZE = 1000
@@ -235,42 +521,69 @@ def test_config():
         yield config
 
 
-@pytest.fixture
-def mock_rag_system(test_config, mock_vector_store, mock_ai_generator):
-    """Create a mock RAG system for API testing"""
-    mock_rag = Mock(spec=RAGSystem)
-    
-    # Mock session manager
-    mock_session_manager = Mock()
-    mock_session_manager.create_session.return_value = "test_session_123"
-    mock_rag.session_manager = mock_session_manager
-    
-    # Mock query method
-    def mock_query(query: str, session_id: str = None):
-        if query == "test error":
-            return "I apologize, but I encountered an error processing your query.", []
-        elif query == "python basics":
-            return "Python is a programming language used for many applications.", [
-                {"text": "Python Programming - Lesson 1", "url": "https://example.com/python/lesson1"}
-            ]
-        else:
-            return "Test response for your query.", [
-                {"text": "Test Source", "url": None}
-            ]
-    
-    mock_rag.query.side_effect = mock_query
-    
-    # Mock course analytics
+def _mock_rag_query(query: str, session_id: str = None):
+    """Canned query behavior for the mocked RAG system"""
+    if query == "test error":
+        return "I apologize, but I encountered an error processing your query.", []
+    elif query == "python basics":
+        return "Python is a programming language used for many applications.", [
+            {"text": "Python Programming - Lesson 1", "url": "https://example.com/python/lesson1"}
+        ]
+    else:
+        return "Test response for your query.", [
+            {"text": "Test Source", "url": None}
+        ]
+
+
+def _rewire_mock_rag_system(mock_rag):
+    """Restore canned behavior and clear call records on the shared RAG mock"""
+    mock_rag.query.reset_mock(return_value=True, side_effect=True)
+    mock_rag.query.side_effect = _mock_rag_query
+
+    mock_rag.session_manager.create_session.reset_mock(return_value=True)
+    mock_rag.session_manager.create_session.return_value = "test_session_123"
+
+    mock_rag.get_course_analytics.reset_mock(return_value=True)
     mock_rag.get_course_analytics.return_value = {
         "total_courses": 2,
         "course_titles": ["Introduction to Python", "Model Context Protocol"]
     }
-    
+
+
+@pytest.fixture(scope="session")
+def _mock_rag_system_session():
+    """Session-scoped RAG mock shell backing the test app (see mock_rag_system)"""
+    # Imported lazily - rag_system pulls in the whole backend stack
+    from rag_system import RAGSystem
+
+    mock_rag = Mock(spec=RAGSystem)
+    mock_rag.session_manager = Mock()
+    mock_rag.query = AsyncMock()
     return mock_rag
 
 
 @pytest.fixture
-def test_app(mock_rag_system):
+def mock_rag_system(_mock_rag_system_session):
+    """Per-test view of the shared RAG mock with canned behavior restored"""
+    _rewire_mock_rag_system(_mock_rag_system_session)
+    return _mock_rag_system_session
+
+
+@pytest.fixture(autouse=True)
+def _reset_app_state(request):
+    """Reset shared RAG mock state for tests using the session-scoped client
+
+    The TestClient and the app behind it live for the whole session, so call
+    records and canned responses on the RAG mock are restored per test here
+    instead of rebuilding the client.
+    """
+    if "test_client" in request.fixturenames or "test_app" in request.fixturenames:
+        request.getfixturevalue("mock_rag_system")
+    yield
+
+
+@pytest.fixture(scope="session")
+def test_app(_mock_rag_system_session):
     """Create a test FastAPI app with mocked dependencies"""
     from fastapi import FastAPI
     from fastapi.middleware.cors import CORSMiddleware
@@ -306,15 +619,23 @@ def test_app(mock_rag_system):
     class CourseStats(BaseModel):
         total_courses: int
         course_titles: List[str]
-    
+
+    class BatchCall(BaseModel):
+        op: str
+        payload: Optional[dict] = None
+        input_from: Optional[int] = None
+
+    class BatchResponse(BaseModel):
+        results: List[Union[QueryResponse, CourseStats]]
+
     # API endpoints with mocked RAG system
     @app.post("/api/query", response_model=QueryResponse)
     async def query_documents(request: QueryRequest):
         session_id = request.session_id
         if not session_id:
-            session_id = mock_rag_system.session_manager.create_session()
-        
-        answer, sources = mock_rag_system.query(request.query, session_id)
+            session_id = _mock_rag_system_session.session_manager.create_session()
+
+        answer, sources = await _mock_rag_system_session.query(request.query, session_id)
         
         return QueryResponse(
             answer=answer,
@@ -324,12 +645,30 @@ def test_app(mock_rag_system):
     
     @app.get("/api/courses", response_model=CourseStats)
     async def get_course_stats():
-        analytics = mock_rag_system.get_course_analytics()
+        analytics = _mock_rag_system_session.get_course_analytics()
         return CourseStats(
             total_courses=analytics["total_courses"],
             course_titles=analytics["course_titles"]
         )
-    
+
+    @app.post("/api/batch", response_model=BatchResponse)
+    async def batch_requests(calls: List[BatchCall]):
+        # Mirrors the production /api/batch: dependency layers via input_from,
+        # dependent queries inherit the referenced call's session_id
+        results = [None] * len(calls)
+        for i, batch_call in enumerate(calls):
+            if batch_call.op == "courses":
+                results[i] = await get_course_stats()
+            else:
+                payload = dict(batch_call.payload or {})
+                if batch_call.input_from is not None:
+                    payload.setdefault(
+                        "session_id", results[batch_call.input_from].session_id
+                    )
+                results[i] = await query_documents(QueryRequest(**payload))
+        return BatchResponse(results=results)
+
+
     @app.get("/")
     async def root():
         return {"message": "Course Materials RAG System"}
@@ -337,7 +676,8 @@ def test_app(mock_rag_system):
     return app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client(test_app):
-    """Create a test client for API testing"""
-    return TestClient(test_app)
+    """Session-scoped test client, entered as a context manager to run lifespan"""
+    with TestClient(test_app) as client:
+        yield client
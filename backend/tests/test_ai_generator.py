@@ -1,823 +1,889 @@
-from unittest.mock import Mock, call, patch
-
-import pytest
-from ai_generator import AIGenerator
-from anthropic import APIError, RateLimitError
-from anthropic._exceptions import OverloadedError
-from search_tools import CourseSearchTool, ToolManager
-
-
-class TestAIGenerator:
-    """Test suite for AIGenerator tool calling functionality"""
-
-    def test_generate_response_without_tools(self, mock_ai_generator):
-        """Test basic response generation without tools"""
-        response = mock_ai_generator.generate_response("What is Python?")
-
-        # Verify the API was called with correct parameters
-        mock_ai_generator.client.messages.create.assert_called_once()
-        call_args = mock_ai_generator.client.messages.create.call_args[1]
-
-        assert call_args["model"] == "claude-3-sonnet-20240229"
-        assert call_args["temperature"] == 0
-        assert call_args["max_tokens"] == 800
-        assert call_args["messages"] == [{"role": "user", "content": "What is Python?"}]
-        assert call_args["system"] == mock_ai_generator.SYSTEM_PROMPT
-        assert "tools" not in call_args
-
-    def test_generate_response_with_tools(self, mock_ai_generator, course_search_tool):
-        """Test response generation with tools provided"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-
-        # Mock the tool manager's execute_tool method
-        tool_manager.execute_tool = Mock(return_value="Search results here")
-
-        # Configure mock to use tool once, then provide final response
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            mock_response = Mock()
-
-            if call_count == 1:
-                # First round - use tool
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_use_1"
-                mock_response.content = [mock_content_block]
-            else:
-                # Second round - final response without tools
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Here's the answer based on the search."
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="What is Python?",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify API calls were made (tool use + final response)
-        assert mock_ai_generator.client.messages.create.call_count == 2
-
-        # Verify the first API call (initial) had tools
-        first_call_args = mock_ai_generator.client.messages.create.call_args_list[0][1]
-        assert "tools" in first_call_args
-        assert first_call_args["tool_choice"] == {"type": "auto"}
-
-        # Verify tool was executed once
-        tool_manager.execute_tool.assert_called_once()
-
-        # Verify final response
-        assert response == "Here's the answer based on the search."
-
-    def test_handle_tool_execution_flow(self, mock_ai_generator, course_search_tool):
-        """Test the complete tool execution flow"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-
-        # Mock tool execution to return specific results
-        tool_manager.execute_tool = Mock(
-            return_value="Python is a programming language"
-        )
-
-        # Configure mock to simulate tool use response first, then final response
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            if "tools" in kwargs and len(kwargs.get("messages", [])) == 1:
-                # First call with tools - return tool use
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "python basics"}
-                mock_content_block.id = "tool_use_123"
-                mock_response.content = [mock_content_block]
-            else:
-                # Final call without tools - return text response
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = (
-                    "Based on the search, Python is a programming language."
-                )
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Tell me about Python",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify tool was executed
-        tool_manager.execute_tool.assert_called_once_with(
-            "search_course_content", query="python basics"
-        )
-
-        # Verify final response
-        assert response == "Based on the search, Python is a programming language."
-
-        # Verify the API was called twice (initial + follow-up)
-        assert mock_ai_generator.client.messages.create.call_count == 2
-
-    def test_handle_tool_execution_with_conversation_history(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test tool execution with conversation history context"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Search results")
-
-        conversation_history = "User: Hello\nAI: Hi there!"
-
-        response = mock_ai_generator.generate_response(
-            query="What is Python?",
-            conversation_history=conversation_history,
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify conversation history was included in system prompt
-        call_args = mock_ai_generator.client.messages.create.call_args[1]
-        expected_system = f"{mock_ai_generator.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-        assert call_args["system"] == expected_system
-
-    def test_tool_execution_multiple_tools(
-        self, mock_ai_generator, course_search_tool, course_outline_tool
-    ):
-        """Test handling of multiple tool calls in one response"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.register_tool(course_outline_tool)
-
-        # Mock tool executions
-        def mock_execute_tool(tool_name, **kwargs):
-            if tool_name == "search_course_content":
-                return "Search results for content"
-            elif tool_name == "get_course_outline":
-                return "Course outline results"
-            return "Unknown tool"
-
-        tool_manager.execute_tool = Mock(side_effect=mock_execute_tool)
-
-        # Configure mock to return multiple tool uses
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            if "tools" in kwargs and len(kwargs.get("messages", [])) == 1:
-                # First call - return multiple tool uses
-                mock_response.stop_reason = "tool_use"
-
-                # First tool use
-                mock_content_block1 = Mock()
-                mock_content_block1.type = "tool_use"
-                mock_content_block1.name = "search_course_content"
-                mock_content_block1.input = {"query": "python"}
-                mock_content_block1.id = "tool_use_1"
-
-                # Second tool use
-                mock_content_block2 = Mock()
-                mock_content_block2.type = "tool_use"
-                mock_content_block2.name = "get_course_outline"
-                mock_content_block2.input = {"course_title": "Python"}
-                mock_content_block2.id = "tool_use_2"
-
-                mock_response.content = [mock_content_block1, mock_content_block2]
-            else:
-                # Final response
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Here's the information you requested."
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Tell me about Python course",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify both tools were executed
-        assert tool_manager.execute_tool.call_count == 2
-        tool_manager.execute_tool.assert_has_calls(
-            [
-                call("search_course_content", query="python"),
-                call("get_course_outline", course_title="Python"),
-            ]
-        )
-
-    def test_system_prompt_content(self):
-        """Test that the system prompt contains expected instructions"""
-        system_prompt = AIGenerator.SYSTEM_PROMPT
-
-        # Verify key instruction elements
-        assert "Course Content Search" in system_prompt
-        assert "Course Outline" in system_prompt
-        assert "search_course_content" in system_prompt
-        assert "get_course_outline" in system_prompt
-        assert "You may make multiple tool calls across up to 2 rounds" in system_prompt
-        assert "No meta-commentary" in system_prompt
-
-    def test_base_parameters_configuration(self):
-        """Test that base parameters are properly configured"""
-        ai_gen = AIGenerator("test_key", "claude-3-sonnet-20240229")
-
-        expected_params = {
-            "model": "claude-3-sonnet-20240229",
-            "temperature": 0,
-            "max_tokens": 800,
-        }
-
-        assert ai_gen.base_params == expected_params
-
-    def test_tool_result_message_structure(self, mock_ai_generator, course_search_tool):
-        """Test that tool results are properly structured in follow-up messages"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Tool execution result")
-
-        # Track the actual API calls to verify message structure
-        api_calls = []
-
-        def capture_create(**kwargs):
-            api_calls.append(kwargs)
-            mock_response = Mock()
-
-            if len(api_calls) == 1:
-                # First call - return tool use
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_123"
-                mock_response.content = [mock_content_block]
-            else:
-                # Second call - final response
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Final response"
-                mock_response.content = [mock_text_block]
-
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = capture_create
-
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify two API calls were made
-        assert len(api_calls) == 2
-
-        # Verify the second call has the proper message structure
-        second_call = api_calls[1]
-        messages = second_call["messages"]
-
-        # Should have: user message, assistant tool use, user tool result
-        assert len(messages) == 3
-        assert messages[0]["role"] == "user"
-        assert messages[1]["role"] == "assistant"
-        assert messages[2]["role"] == "user"
-
-        # Verify tool result structure
-        tool_result_content = messages[2]["content"]
-        assert len(tool_result_content) == 1
-        assert tool_result_content[0]["type"] == "tool_result"
-        assert tool_result_content[0]["tool_use_id"] == "tool_123"
-        assert tool_result_content[0]["content"] == "Tool execution result"
-
-    def test_no_tool_manager_provided(self, mock_ai_generator, course_search_tool):
-        """Test behavior when tool_manager is not provided but tools are present"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-
-        # Configure to return tool_use but no tool_manager provided
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            mock_response.stop_reason = "tool_use"
-            mock_content_block = Mock()
-            mock_content_block.type = "tool_use"
-            mock_response.content = [mock_content_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        # Should not crash and should handle gracefully
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=None,  # No tool manager provided
-        )
-
-        # Should return error message since tool_manager is None but tools were requested
-        assert response == "Tools were requested but no tool manager was provided."
-
-    def test_conversation_history_formatting(self, mock_ai_generator):
-        """Test that conversation history is properly formatted in system content"""
-        # Test with conversation history
-        history = "Previous conversation content"
-
-        mock_ai_generator.generate_response(
-            query="Test query", conversation_history=history
-        )
-
-        call_args = mock_ai_generator.client.messages.create.call_args[1]
-        expected_system = (
-            f"{mock_ai_generator.SYSTEM_PROMPT}\n\nPrevious conversation:\n{history}"
-        )
-        assert call_args["system"] == expected_system
-
-        # Reset mock
-        mock_ai_generator.client.messages.create.reset_mock()
-
-        # Test without conversation history
-        mock_ai_generator.generate_response(query="Test query")
-
-        call_args = mock_ai_generator.client.messages.create.call_args[1]
-        assert call_args["system"] == mock_ai_generator.SYSTEM_PROMPT
-
-    def test_api_retry_on_overloaded_error(self):
-        """Test retry logic for OverloadedError"""
-        ai_gen = AIGenerator(
-            "test_key", "claude-3-sonnet-20240229", max_retries=2, retry_delay=0.1
-        )
-
-        # Mock client to fail twice then succeed
-        success_response = Mock()
-        success_response.stop_reason = "end_turn"
-        success_response.content = [Mock(text="Success after retry")]
-
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            if call_count <= 2:
-                error_response = Mock()
-                raise OverloadedError(
-                    "API overloaded", response=error_response, body={}
-                )
-            return success_response
-
-        ai_gen.client.messages.create = Mock(side_effect=mock_create)
-
-        # Should succeed after retries
-        result = ai_gen.generate_response("Test query")
-
-        assert result == "Success after retry"
-        assert ai_gen.client.messages.create.call_count == 3  # 2 failures + 1 success
-
-    def test_api_retry_on_rate_limit_error(self):
-        """Test retry logic for RateLimitError"""
-        ai_gen = AIGenerator(
-            "test_key", "claude-3-sonnet-20240229", max_retries=1, retry_delay=0.1
-        )
-
-        # Mock client to fail once then succeed
-        success_response = Mock()
-        success_response.stop_reason = "end_turn"
-        success_response.content = [Mock(text="Success after rate limit")]
-
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            if call_count == 1:
-                error_response = Mock()
-                raise RateLimitError("Rate limited", response=error_response, body={})
-            return success_response
-
-        ai_gen.client.messages.create = Mock(side_effect=mock_create)
-
-        result = ai_gen.generate_response("Test query")
-
-        assert result == "Success after rate limit"
-        assert ai_gen.client.messages.create.call_count == 2
-
-    def test_api_retry_exhausted(self):
-        """Test behavior when all retries are exhausted"""
-        ai_gen = AIGenerator(
-            "test_key", "claude-3-sonnet-20240229", max_retries=1, retry_delay=0.1
-        )
-
-        # Mock client to always fail
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            raise OverloadedError(
-                "Persistent overload", response=mock_response, body={}
-            )
-
-        ai_gen.client.messages.create = Mock(side_effect=mock_create)
-
-        # Should return error message after exhausting retries
-        result = ai_gen.generate_response("Test query")
-        assert "I encountered an error while processing your request" in result
-
-        assert ai_gen.client.messages.create.call_count == 2  # max_retries + 1
-
-    def test_api_no_retry_on_non_retryable_error(self):
-        """Test that non-retryable errors don't trigger retries"""
-        ai_gen = AIGenerator(
-            "test_key", "claude-3-sonnet-20240229", max_retries=3, retry_delay=0.1
-        )
-
-        # Mock client to raise non-retryable error
-        def mock_create(**kwargs):
-            mock_request = Mock()
-            raise APIError("Authentication failed", request=mock_request, body={})
-
-        ai_gen.client.messages.create = Mock(side_effect=mock_create)
-
-        # Should return error message immediately without retries
-        result = ai_gen.generate_response("Test query")
-        assert "I encountered an error while processing your request" in result
-
-        assert ai_gen.client.messages.create.call_count == 1  # No retries
-
-    def test_retry_configuration(self):
-        """Test that retry configuration is properly set"""
-        ai_gen = AIGenerator(
-            "test_key",
-            "claude-3-sonnet-20240229",
-            max_retries=5,
-            retry_delay=2.0,
-            max_retry_delay=120.0,
-        )
-
-        assert ai_gen.max_retries == 5
-        assert ai_gen.retry_delay == 2.0
-        assert ai_gen.max_retry_delay == 120.0
-
-    def test_retry_in_tool_execution_flow(self):
-        """Test retry logic works in tool execution flow"""
-        ai_gen = AIGenerator(
-            "test_key", "claude-3-sonnet-20240229", max_retries=1, retry_delay=0.1
-        )
-
-        # Mock tool manager
-        tool_manager = Mock()
-        tool_manager.execute_tool.return_value = "Tool result"
-
-        # First call succeeds with tool use, second call (follow-up) fails then succeeds
-        first_response = Mock()
-        first_response.stop_reason = "tool_use"
-        first_response.content = [
-            Mock(type="tool_use", name="test_tool", input={}, id="123")
-        ]
-
-        second_response = Mock()
-        second_response.stop_reason = "end_turn"
-        second_response.content = [Mock(text="Final response")]
-
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            if call_count == 1:
-                return first_response
-            elif call_count == 2:
-                mock_response = Mock()
-                raise OverloadedError(
-                    "Overloaded on follow-up", response=mock_response, body={}
-                )
-            else:
-                return second_response
-
-        ai_gen.client.messages.create = Mock(side_effect=mock_create)
-
-        result = ai_gen.generate_response(
-            "Test query", tools=[{}], tool_manager=tool_manager
-        )
-
-        assert result == "Final response"
-        assert ai_gen.client.messages.create.call_count == 3  # First + retry on second
-
-    def test_sequential_tool_calling_two_rounds(
-        self, mock_ai_generator, course_search_tool, course_outline_tool
-    ):
-        """Test sequential tool calling across 2 rounds"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.register_tool(course_outline_tool)
-
-        # Mock tool executions
-        def mock_execute_tool(tool_name, **kwargs):
-            if tool_name == "get_course_outline":
-                return "Course X has Lesson 4: Python Basics"
-            elif tool_name == "search_course_content":
-                return "Found Course Y that covers Python Basics"
-            return "Unknown tool result"
-
-        tool_manager.execute_tool = Mock(side_effect=mock_execute_tool)
-
-        # Configure mock to simulate 2 rounds of tool calls then final response
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            mock_response = Mock()
-
-            if call_count == 1:
-                # First round - get course outline
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "get_course_outline"
-                mock_content_block.input = {"course_title": "Course X"}
-                mock_content_block.id = "tool_use_1"
-                mock_response.content = [mock_content_block]
-            elif call_count == 2:
-                # Second round - search for similar course
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "Python Basics"}
-                mock_content_block.id = "tool_use_2"
-                mock_response.content = [mock_content_block]
-            else:
-                # Final response after 2 rounds
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = (
-                    "Course Y covers the same topic as Lesson 4 of Course X."
-                )
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Find a course that discusses the same topic as lesson 4 of Course X",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify both tools were executed
-        assert tool_manager.execute_tool.call_count == 2
-        tool_manager.execute_tool.assert_has_calls(
-            [
-                call("get_course_outline", course_title="Course X"),
-                call("search_course_content", query="Python Basics"),
-            ]
-        )
-
-        # Verify final response
-        assert response == "Course Y covers the same topic as Lesson 4 of Course X."
-
-        # Verify 3 API calls were made (2 tool rounds + 1 final)
-        assert mock_ai_generator.client.messages.create.call_count == 3
-
-    def test_sequential_tool_calling_terminates_on_non_tool_response(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test that sequential calling terminates when Claude doesn't use tools"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Search results")
-
-        # Configure mock to use tool once, then provide final response
-        call_count = 0
-
-        def mock_create(**kwargs):
-            nonlocal call_count
-            call_count += 1
-            mock_response = Mock()
-
-            if call_count == 1:
-                # First round - use tool
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_use_1"
-                mock_response.content = [mock_content_block]
-            else:
-                # Second round - final response without tools
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Here's the answer based on the search."
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify only one tool execution
-        assert tool_manager.execute_tool.call_count == 1
-
-        # Verify final response
-        assert response == "Here's the answer based on the search."
-
-        # Verify only 2 API calls (tool use + final response)
-        assert mock_ai_generator.client.messages.create.call_count == 2
-
-    def test_sequential_tool_calling_max_rounds_reached(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test behavior when max rounds is reached"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Search results")
-
-        # Configure mock to always return tool use responses
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            if "tools" in kwargs:
-                # Tool use response
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_use_1"
-                mock_response.content = [mock_content_block]
-            else:
-                # Final response without tools
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Final response after max rounds."
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-            max_rounds=2,
-        )
-
-        # Verify tool was executed twice (max rounds)
-        assert tool_manager.execute_tool.call_count == 2
-
-        # Verify final response
-        assert response == "Final response after max rounds."
-
-        # Verify 3 API calls (2 tool rounds + 1 final without tools)
-        assert mock_ai_generator.client.messages.create.call_count == 3
-
-    def test_sequential_tool_calling_tool_execution_failure(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test behavior when tool execution fails in sequential calling"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-
-        # Mock tool manager to raise exception
-        tool_manager.execute_tool = Mock(side_effect=Exception("Tool execution failed"))
-
-        # Configure mock to return tool use
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            mock_response.stop_reason = "tool_use"
-            mock_content_block = Mock()
-            mock_content_block.type = "tool_use"
-            mock_content_block.name = "search_course_content"
-            mock_content_block.input = {"query": "test"}
-            mock_content_block.id = "tool_use_1"
-            mock_response.content = [mock_content_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify tool execution was attempted
-        assert tool_manager.execute_tool.call_count == 1
-
-        # Verify error response
-        assert response == "I encountered an error while executing the requested tools."
-
-        # Verify only 1 API call (failed on first tool round)
-        assert mock_ai_generator.client.messages.create.call_count == 1
-
-    def test_sequential_tool_calling_conversation_context_preserved(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test that conversation context is preserved across sequential rounds"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Search results")
-
-        conversation_history = "User: Previous question\nAI: Previous answer"
-
-        # Track the actual API calls to verify message structure
-        api_calls = []
-
-        def capture_create(**kwargs):
-            api_calls.append(kwargs)
-            mock_response = Mock()
-
-            if len(api_calls) == 1:
-                # First call - return tool use
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_123"
-                mock_response.content = [mock_content_block]
-            else:
-                # Subsequent calls - final response
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Final response"
-                mock_response.content = [mock_text_block]
-
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = capture_create
-
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            conversation_history=conversation_history,
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-        )
-
-        # Verify conversation history was included in both calls
-        for call_args in api_calls:
-            expected_system = f"{mock_ai_generator.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            assert call_args["system"] == expected_system
-
-        # Verify we had exactly 2 API calls (tool use + final response)
-        assert len(api_calls) == 2
-
-        # The sequential implementation accumulates messages across rounds
-        # Both calls should preserve conversation context
-        assert len(api_calls[0]["messages"]) >= 1  # At least the initial message
-        assert (
-            len(api_calls[1]["messages"]) >= 3
-        )  # Initial + assistant tool use + tool result
-
-    def test_max_rounds_parameter_customization(
-        self, mock_ai_generator, course_search_tool
-    ):
-        """Test that max_rounds parameter can be customized"""
-        tool_manager = ToolManager()
-        tool_manager.register_tool(course_search_tool)
-        tool_manager.execute_tool = Mock(return_value="Search results")
-
-        # Configure mock to always return tool use responses
-        def mock_create(**kwargs):
-            mock_response = Mock()
-            if "tools" in kwargs:
-                mock_response.stop_reason = "tool_use"
-                mock_content_block = Mock()
-                mock_content_block.type = "tool_use"
-                mock_content_block.name = "search_course_content"
-                mock_content_block.input = {"query": "test"}
-                mock_content_block.id = "tool_use_1"
-                mock_response.content = [mock_content_block]
-            else:
-                mock_response.stop_reason = "end_turn"
-                mock_text_block = Mock()
-                mock_text_block.text = "Final response"
-                mock_response.content = [mock_text_block]
-            return mock_response
-
-        mock_ai_generator.client.messages.create.side_effect = mock_create
-
-        # Test with max_rounds=1
-        response = mock_ai_generator.generate_response(
-            query="Test query",
-            tools=tool_manager.get_tool_definitions(),
-            tool_manager=tool_manager,
-            max_rounds=1,
-        )
-
-        # Verify only one tool execution
-        assert tool_manager.execute_tool.call_count == 1
-
-        # Verify 2 API calls (1 tool round + 1 final)
-        assert mock_ai_generator.client.messages.create.call_count == 2
+import asyncio
+import re
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, call, patch
+
+import pytest
+from ai_generator import AIGenerator
+from anthropic import APIError, RateLimitError
+from anthropic._exceptions import OverloadedError
+from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
+
+# Keep these tests on one worker under pytest-xdist's --dist loadgroup (they
+# share module-scoped fixtures), and escalate warnings to errors so new SDK
+# warnings - which tend to signal per-test overhead creeping in - fail fast.
+# Known anthropic deprecations stay ignored.
+pytestmark = [
+    pytest.mark.xdist_group("ai_generator"),
+    pytest.mark.filterwarnings("error"),
+    pytest.mark.filterwarnings("ignore::DeprecationWarning:anthropic"),
+]
+
+
+# Instructions the system prompt must contain, checked in a single scan
+# instead of one substring search per token
+_REQUIRED_PROMPT_TOKENS = (
+    "Course Content Search",
+    "Course Outline",
+    "search_course_content",
+    "get_course_outline",
+    "You may make multiple tool calls across up to 2 rounds",
+    "No meta-commentary",
+)
+_PROMPT_TOKEN_REGEX = re.compile("|".join(map(re.escape, _REQUIRED_PROMPT_TOKENS)))
+
+
+def tool_use_response(name, inp, tid):
+    """Build a minimal Anthropic tool_use response for mocking messages.create"""
+    return SimpleNamespace(
+        stop_reason="tool_use",
+        content=[SimpleNamespace(type="tool_use", name=name, input=inp, id=tid)],
+    )
+
+
+def text_response(text):
+    """Build a minimal Anthropic end_turn text response for mocking messages.create"""
+    return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(text=text)])
+
+
+# Prebuilt responses for tests whose side_effect is a plain sequence; the
+# generator only reads these, so sharing single instances is safe
+_SEARCH_TOOL_USE = tool_use_response("search_course_content", {"query": "test"}, "tool_123")
+_FINAL_RESPONSE = text_response("Final response")
+
+
+@pytest.fixture(scope="module")
+def tool_defs():
+    """Tool definition list shared by every tool-flow test in this module
+
+    get_tool_definition only assembles static schema dicts - it never touches
+    the vector store - so build the list once instead of re-traversing the
+    registered tools in each test. Stores are stand-in Mocks for that reason.
+    """
+    tool_manager = ToolManager()
+    tool_manager.register_tool(CourseSearchTool(Mock()))
+    tool_manager.register_tool(CourseOutlineTool(Mock()))
+    return tool_manager.get_tool_definitions()
+
+
+@pytest.fixture
+def configured_tool_manager(course_search_tool, course_outline_tool):
+    """ToolManager with both tools registered
+
+    The registration boilerplate was identical across the tool-flow tests;
+    each test overwrites execute_tool with whatever mock it needs.
+    """
+    tool_manager = ToolManager()
+    tool_manager.register_tool(course_search_tool)
+    tool_manager.register_tool(course_outline_tool)
+    return tool_manager
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(request, monkeypatch):
+    """Make backoff sleeps instant for every test in this module
+
+    The retry paths only assert control flow, so real waiting is pure
+    wall-clock waste and would silently creep back in if someone re-adds
+    delays. Tests that genuinely depend on elapsed time opt out with
+    @pytest.mark.real_sleep.
+    """
+    if request.node.get_closest_marker("real_sleep"):
+        return
+    real_sleep = asyncio.sleep
+
+    async def _instant(delay, *args, **kwargs):
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", _instant)
+
+
+@pytest.fixture(scope="module")
+def _retry_ai_gen_module():
+    """One AIGenerator shared by the retry tests
+
+    Constructing the generator builds a real SDK client (TLS context,
+    connection pool), so pay that cost once per module instead of per test.
+    """
+    # Zero delays: the tests assert retry *counts*, not elapsed time, and
+    # max_retry_delay=0 clamps backoff/jitter so no attempt actually waits
+    return AIGenerator(
+        "test_key",
+        "claude-3-sonnet-20240229",
+        max_retries=1,
+        retry_delay=0.0,
+        max_retry_delay=0.0,
+    )
+
+
+@pytest.fixture
+def retry_ai_gen(_retry_ai_gen_module):
+    """Per-test view of the shared retry generator
+
+    Tests reassign client.messages.create and may tweak the retry knobs;
+    teardown restores the defaults so tests stay order-independent.
+    """
+    gen = _retry_ai_gen_module
+    yield gen
+    gen.max_retries = 1
+    gen.retry_delay = 0.0
+    gen.max_retry_delay = 0.0
+    gen.request_timeout = 20.0
+
+
+class TestAIGenerator:
+    """Test suite for AIGenerator tool calling functionality"""
+
+    async def test_generate_response_without_tools(self, mock_ai_generator):
+        """Test basic response generation without tools"""
+        response = await mock_ai_generator.generate_response("What is Python?")
+
+        # Verify the API was called with correct parameters
+        mock_ai_generator.client.messages.create.assert_called_once()
+        call_args = mock_ai_generator.client.messages.create.call_args[1]
+
+        assert call_args["model"] == "claude-3-sonnet-20240229"
+        assert call_args["temperature"] == 0
+        assert call_args["max_tokens"] == 800
+        assert call_args["messages"] == [{"role": "user", "content": "What is Python?"}]
+        assert call_args["system"] == [
+            {
+                "type": "text",
+                "text": mock_ai_generator.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert "tools" not in call_args
+
+    async def test_tool_use_then_final_response_flow(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test the complete single-round tool flow in one pass
+
+        Covers request shape, tool dispatch, tool_result message structure,
+        and termination on end_turn. These used to be four separate tests
+        that all built the same two-call mock trajectory.
+        """
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Tool execution result")
+
+        # Track the actual API calls to verify message structure
+        api_calls = []
+
+        def capture_create(**kwargs):
+            api_calls.append(kwargs)
+            if len(api_calls) == 1:
+                # First call - return tool use
+                return tool_use_response(
+                    "search_course_content", {"query": "python basics"}, "tool_123"
+                )
+            # Second call - final response
+            return text_response("Here's the answer based on the search.")
+
+        mock_ai_generator.client.messages.create.side_effect = capture_create
+
+        response = await mock_ai_generator.generate_response(
+            query="Tell me about Python",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # Request shape: the initial call advertises tools with auto choice
+        assert "tools" in api_calls[0]
+        assert api_calls[0]["tool_choice"] == {"type": "auto"}
+
+        # Tool dispatch: executed exactly once with Claude's arguments
+        tool_manager.execute_tool.assert_called_once_with(
+            "search_course_content", query="python basics"
+        )
+
+        # Follow-up structure: user message, assistant tool use, user tool result
+        messages = api_calls[1]["messages"]
+        assert len(messages) == 3
+        assert [m["role"] for m in messages] == ["user", "assistant", "user"]
+        tool_result_content = messages[2]["content"]
+        assert len(tool_result_content) == 1
+        assert tool_result_content[0]["type"] == "tool_result"
+        assert tool_result_content[0]["tool_use_id"] == "tool_123"
+        assert tool_result_content[0]["content"] == "Tool execution result"
+
+        # Termination: end_turn stops the loop after exactly two API calls
+        assert response == "Here's the answer based on the search."
+        assert len(api_calls) == 2
+
+    async def test_handle_tool_execution_with_conversation_history(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test tool execution with conversation history context"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        conversation_history = "User: Hello\nAI: Hi there!"
+
+        response = await mock_ai_generator.generate_response(
+            query="What is Python?",
+            conversation_history=conversation_history,
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # Verify conversation history was included as an uncached system block
+        call_args = mock_ai_generator.client.messages.create.call_args[1]
+        expected_system = [
+            {
+                "type": "text",
+                "text": mock_ai_generator.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            },
+            {
+                "type": "text",
+                "text": f"Previous conversation:\n{conversation_history}",
+            },
+        ]
+        assert call_args["system"] == expected_system
+
+    async def test_tool_execution_multiple_tools(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test handling of multiple tool calls in one response"""
+        tool_manager = configured_tool_manager
+
+        # Mock tool executions
+        def mock_execute_tool(tool_name, **kwargs):
+            if tool_name == "search_course_content":
+                return "Search results for content"
+            elif tool_name == "get_course_outline":
+                return "Course outline results"
+            return "Unknown tool"
+
+        tool_manager.execute_tool = Mock(side_effect=mock_execute_tool)
+
+        # Configure mock to return multiple tool uses
+        def mock_create(**kwargs):
+            if "tools" in kwargs and len(kwargs.get("messages", [])) == 1:
+                # First call - return multiple tool uses in one response
+                return SimpleNamespace(
+                    stop_reason="tool_use",
+                    content=[
+                        SimpleNamespace(
+                            type="tool_use",
+                            name="search_course_content",
+                            input={"query": "python"},
+                            id="tool_use_1",
+                        ),
+                        SimpleNamespace(
+                            type="tool_use",
+                            name="get_course_outline",
+                            input={"course_title": "Python"},
+                            id="tool_use_2",
+                        ),
+                    ],
+                )
+            # Final response
+            return text_response("Here's the information you requested.")
+
+        mock_ai_generator.client.messages.create.side_effect = mock_create
+
+        response = await mock_ai_generator.generate_response(
+            query="Tell me about Python course",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # Verify both tools were executed, in order; exact list equality is
+        # cheaper than assert_has_calls' subsequence scan
+        assert tool_manager.execute_tool.call_args_list == [
+            call("search_course_content", query="python"),
+            call("get_course_outline", course_title="Python"),
+        ]
+
+    def test_system_prompt_content(self):
+        """Test that the system prompt contains expected instructions"""
+        found = set(_PROMPT_TOKEN_REGEX.findall(AIGenerator.SYSTEM_PROMPT))
+        assert found == set(_REQUIRED_PROMPT_TOKENS)
+
+    def test_base_parameters_configuration(self):
+        """Test that base parameters are properly configured"""
+        ai_gen = AIGenerator("test_key", "claude-3-sonnet-20240229")
+
+        expected_params = {
+            "model": "claude-3-sonnet-20240229",
+            "temperature": 0,
+            "max_tokens": 800,
+        }
+
+        assert ai_gen.base_params == expected_params
+
+    async def test_no_tool_manager_provided(self, mock_ai_generator, tool_defs):
+        """Test behavior when tool_manager is not provided but tools are present"""
+        # Configure to return tool_use but no tool_manager provided
+        def mock_create(**kwargs):
+            return tool_use_response(
+                "search_course_content", {"query": "test"}, "tool_use_1"
+            )
+
+        mock_ai_generator.client.messages.create.side_effect = mock_create
+
+        # Should not crash and should handle gracefully
+        response = await mock_ai_generator.generate_response(
+            query="Test query",
+            tools=tool_defs,
+            tool_manager=None,  # No tool manager provided
+        )
+
+        # Should return error message since tool_manager is None but tools were requested
+        assert response == "Tools were requested but no tool manager was provided."
+
+    async def test_conversation_history_formatting(self, mock_ai_generator):
+        """Test that conversation history is properly formatted in system content"""
+        # Test with conversation history
+        history = "Previous conversation content"
+
+        await mock_ai_generator.generate_response(
+            query="Test query", conversation_history=history
+        )
+
+        call_args = mock_ai_generator.client.messages.create.call_args[1]
+        expected_system = [
+            {
+                "type": "text",
+                "text": mock_ai_generator.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": f"Previous conversation:\n{history}"},
+        ]
+        assert call_args["system"] == expected_system
+
+        # Reset mock
+        mock_ai_generator.client.messages.create.reset_mock()
+
+        # Test without conversation history
+        await mock_ai_generator.generate_response(query="Test query")
+
+        call_args = mock_ai_generator.client.messages.create.call_args[1]
+        assert call_args["system"] == [
+            {
+                "type": "text",
+                "text": mock_ai_generator.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    async def test_api_retry_on_overloaded_error(self, retry_ai_gen):
+        """Test retry logic for OverloadedError"""
+        ai_gen = retry_ai_gen
+        ai_gen.max_retries = 2
+
+        # Fail twice then succeed; exceptions in the side_effect list are raised
+        ai_gen.client.messages.create = AsyncMock(
+            side_effect=[
+                OverloadedError("API overloaded", response=Mock(), body={}),
+                OverloadedError("API overloaded", response=Mock(), body={}),
+                text_response("Success after retry"),
+            ]
+        )
+
+        # Should succeed after retries
+        result = await ai_gen.generate_response("Test query")
+
+        assert result == "Success after retry"
+        assert ai_gen.client.messages.create.call_count == 3  # 2 failures + 1 success
+
+    async def test_api_retry_on_rate_limit_error(self, retry_ai_gen):
+        """Test retry logic for RateLimitError"""
+        ai_gen = retry_ai_gen
+
+        # Fail once then succeed
+        ai_gen.client.messages.create = AsyncMock(
+            side_effect=[
+                RateLimitError("Rate limited", response=Mock(), body={}),
+                text_response("Success after rate limit"),
+            ]
+        )
+
+        result = await ai_gen.generate_response("Test query")
+
+        assert result == "Success after rate limit"
+        assert ai_gen.client.messages.create.call_count == 2
+
+    @pytest.mark.real_sleep
+    async def test_api_retry_on_timeout(self, retry_ai_gen):
+        """Test retry logic when a request exceeds the per-attempt timeout"""
+        ai_gen = retry_ai_gen
+        ai_gen.request_timeout = 0.05
+
+        # Mock client to hang once (past the timeout) then succeed
+        success_response = text_response("Success after timeout")
+
+        call_count = 0
+
+        async def mock_create(**kwargs):
+            nonlocal call_count
+            call_count += 1
+            if call_count == 1:
+                await asyncio.sleep(1.0)  # Longer than request_timeout
+            return success_response
+
+        ai_gen.client.messages.create = AsyncMock(side_effect=mock_create)
+
+        result = await ai_gen.generate_response("Test query")
+
+        assert result == "Success after timeout"
+        assert ai_gen.client.messages.create.call_count == 2
+
+    def test_retry_after_hint_extraction(self):
+        """Test that server retry-after headers are parsed into a delay hint"""
+        error = SimpleNamespace(response=SimpleNamespace(headers={"retry-after": "2.5"}))
+        assert AIGenerator._get_retry_after_hint(error) == 2.5
+
+        # Missing or unparseable headers fall back to exponential backoff
+        error.response.headers = {}
+        assert AIGenerator._get_retry_after_hint(error) is None
+
+        error.response.headers = {"retry-after": "soon"}
+        assert AIGenerator._get_retry_after_hint(error) is None
+
+    async def test_api_retry_exhausted(self, retry_ai_gen):
+        """Test behavior when all retries are exhausted"""
+        ai_gen = retry_ai_gen
+
+        # Mock client to always fail
+        def mock_create(**kwargs):
+            mock_response = Mock()
+            raise OverloadedError(
+                "Persistent overload", response=mock_response, body={}
+            )
+
+        ai_gen.client.messages.create = AsyncMock(side_effect=mock_create)
+
+        # Should return error message after exhausting retries
+        result = await ai_gen.generate_response("Test query")
+        assert "I encountered an error while processing your request" in result
+
+        assert ai_gen.client.messages.create.call_count == 2  # max_retries + 1
+
+    async def test_api_no_retry_on_non_retryable_error(self, retry_ai_gen):
+        """Test that non-retryable errors don't trigger retries"""
+        ai_gen = retry_ai_gen
+        ai_gen.max_retries = 3
+
+        # Mock client to raise non-retryable error
+        def mock_create(**kwargs):
+            mock_request = Mock()
+            raise APIError("Authentication failed", request=mock_request, body={})
+
+        ai_gen.client.messages.create = AsyncMock(side_effect=mock_create)
+
+        # Should return error message immediately without retries
+        result = await ai_gen.generate_response("Test query")
+        assert "I encountered an error while processing your request" in result
+
+        assert ai_gen.client.messages.create.call_count == 1  # No retries
+
+    def test_retry_configuration(self):
+        """Test that retry configuration is properly set"""
+        ai_gen = AIGenerator(
+            "test_key",
+            "claude-3-sonnet-20240229",
+            max_retries=5,
+            retry_delay=2.0,
+            max_retry_delay=120.0,
+        )
+
+        assert ai_gen.max_retries == 5
+        assert ai_gen.retry_delay == 2.0
+        assert ai_gen.max_retry_delay == 120.0
+
+    async def test_retry_in_tool_execution_flow(self, retry_ai_gen):
+        """Test retry logic works in tool execution flow"""
+        ai_gen = retry_ai_gen
+
+        # Mock tool manager
+        tool_manager = Mock()
+        tool_manager.execute_tool.return_value = "Tool result"
+
+        # First call succeeds with tool use, second call (follow-up) fails then succeeds
+        ai_gen.client.messages.create = AsyncMock(
+            side_effect=[
+                tool_use_response("test_tool", {}, "123"),
+                OverloadedError("Overloaded on follow-up", response=Mock(), body={}),
+                text_response("Final response"),
+            ]
+        )
+
+        result = await ai_gen.generate_response(
+            "Test query", tools=[{}], tool_manager=tool_manager
+        )
+
+        assert result == "Final response"
+        assert ai_gen.client.messages.create.call_count == 3  # First + retry on second
+
+    async def test_sequential_tool_calling_two_rounds(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test sequential tool calling across 2 rounds"""
+        tool_manager = configured_tool_manager
+
+        # Mock tool executions
+        def mock_execute_tool(tool_name, **kwargs):
+            if tool_name == "get_course_outline":
+                return "Course X has Lesson 4: Python Basics"
+            elif tool_name == "search_course_content":
+                return "Found Course Y that covers Python Basics"
+            return "Unknown tool result"
+
+        tool_manager.execute_tool = Mock(side_effect=mock_execute_tool)
+
+        # Two rounds of tool calls, then the final response
+        mock_ai_generator.client.messages.create.side_effect = [
+            tool_use_response(
+                "get_course_outline", {"course_title": "Course X"}, "tool_use_1"
+            ),
+            tool_use_response(
+                "search_course_content", {"query": "Python Basics"}, "tool_use_2"
+            ),
+            text_response("Course Y covers the same topic as Lesson 4 of Course X."),
+        ]
+
+        response = await mock_ai_generator.generate_response(
+            query="Find a course that discusses the same topic as lesson 4 of Course X",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # Verify both tools were executed, in order
+        assert tool_manager.execute_tool.call_args_list == [
+            call("get_course_outline", course_title="Course X"),
+            call("search_course_content", query="Python Basics"),
+        ]
+
+        # Verify final response
+        assert response == "Course Y covers the same topic as Lesson 4 of Course X."
+
+        # Verify 3 API calls were made (2 tool rounds + 1 final)
+        assert mock_ai_generator.client.messages.create.call_count == 3
+
+    async def test_sequential_tool_calling_max_rounds_reached(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test behavior when max rounds is reached"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        # Configure mock to always return tool use responses
+        def mock_create(**kwargs):
+            if "tools" in kwargs:
+                # Tool use response
+                return tool_use_response(
+                    "search_course_content", {"query": "test"}, "tool_use_1"
+                )
+            # Final response without tools
+            return text_response("Final response after max rounds.")
+
+        mock_ai_generator.client.messages.create.side_effect = mock_create
+
+        response = await mock_ai_generator.generate_response(
+            query="Test query",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+            max_rounds=2,
+        )
+
+        # Verify tool was executed twice (max rounds)
+        assert tool_manager.execute_tool.call_count == 2
+
+        # Verify final response
+        assert response == "Final response after max rounds."
+
+        # Verify 3 API calls (2 tool rounds + 1 final without tools)
+        assert mock_ai_generator.client.messages.create.call_count == 3
+
+    async def test_sequential_tool_calling_tool_execution_failure(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that tool execution failures are surfaced to Claude as error results"""
+        tool_manager = configured_tool_manager
+
+        # Mock tool manager to raise exception
+        tool_manager.execute_tool = Mock(side_effect=Exception("Tool execution failed"))
+
+        # Track the actual API calls to verify error result structure
+        api_calls = []
+
+        def capture_create(**kwargs):
+            api_calls.append(kwargs)
+            if len(api_calls) == 1:
+                # First call - return tool use
+                return tool_use_response(
+                    "search_course_content", {"query": "test"}, "tool_use_1"
+                )
+            # Claude recovers from the failed tool call
+            return text_response("Recovered after tool failure.")
+
+        mock_ai_generator.client.messages.create.side_effect = capture_create
+
+        response = await mock_ai_generator.generate_response(
+            query="Test query",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # Verify tool execution was attempted
+        assert tool_manager.execute_tool.call_count == 1
+
+        # The failure is embedded as an error tool_result so Claude can recover
+        tool_result_content = api_calls[1]["messages"][2]["content"]
+        assert tool_result_content[0]["type"] == "tool_result"
+        assert tool_result_content[0]["is_error"] is True
+        assert "Tool execution failed" in tool_result_content[0]["content"]
+
+        # Verify Claude's recovery response is returned
+        assert response == "Recovered after tool failure."
+
+    async def test_sequential_tool_calling_conversation_context_preserved(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that conversation context is preserved across sequential rounds"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        conversation_history = "User: Previous question\nAI: Previous answer"
+
+        mock_create = mock_ai_generator.client.messages.create
+        mock_create.side_effect = [_SEARCH_TOOL_USE, _FINAL_RESPONSE]
+
+        response = await mock_ai_generator.generate_response(
+            query="Test query",
+            conversation_history=conversation_history,
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        # The mock's own call record replaces a capture closure
+        api_calls = [c.kwargs for c in mock_create.call_args_list]
+
+        # Verify conversation history was included in both calls
+        for call_args in api_calls:
+            expected_system = [
+                {
+                    "type": "text",
+                    "text": mock_ai_generator.SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {
+                    "type": "text",
+                    "text": f"Previous conversation:\n{conversation_history}",
+                },
+            ]
+            assert call_args["system"] == expected_system
+
+        # Verify we had exactly 2 API calls (tool use + final response)
+        assert len(api_calls) == 2
+
+        # The sequential implementation accumulates messages across rounds
+        # Both calls should preserve conversation context
+        assert len(api_calls[0]["messages"]) >= 1  # At least the initial message
+        assert (
+            len(api_calls[1]["messages"]) >= 3
+        )  # Initial + assistant tool use + tool result
+
+    async def test_max_rounds_parameter_customization(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that max_rounds parameter can be customized"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        # One tool round, then the forced final call without tools
+        mock_ai_generator.client.messages.create.side_effect = [
+            _SEARCH_TOOL_USE,
+            _FINAL_RESPONSE,
+        ]
+
+        # Test with max_rounds=1
+        response = await mock_ai_generator.generate_response(
+            query="Test query",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+            max_rounds=1,
+        )
+
+        # Verify only one tool execution
+        assert tool_manager.execute_tool.call_count == 1
+
+        # Verify 2 API calls (1 tool round + 1 final)
+        assert mock_ai_generator.client.messages.create.call_count == 2
+
+    def test_predict_likely_tool_parsing(self):
+        """Test outline-query prediction patterns and course name extraction"""
+        predict = AIGenerator._predict_likely_tool
+
+        assert predict("Show me the outline for the MCP course") == (
+            "get_course_outline",
+            {"course_title": "MCP"},
+        )
+        assert predict("What lessons are in Computer Use?") == (
+            "get_course_outline",
+            {"course_title": "Computer Use"},
+        )
+        assert predict("table of contents of the Chroma course") == (
+            "get_course_outline",
+            {"course_title": "Chroma"},
+        )
+
+        # Content questions should not trigger speculation
+        assert predict("What is covered in lesson 3 of MCP?") is None
+        assert predict("Explain embeddings") is None
+
+    async def test_speculative_tool_predispatch_for_outline_query(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that an outline query pre-dispatches the tool and reuses its result"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Course outline result")
+
+        # Claude requests the exact call that was speculated, then answers
+        api_calls = []
+
+        def capture_create(**kwargs):
+            api_calls.append(kwargs)
+            if len(api_calls) == 1:
+                return tool_use_response(
+                    "get_course_outline", {"course_title": "MCP"}, "tool_use_1"
+                )
+            return text_response("Here is the outline")
+
+        mock_ai_generator.client.messages.create.side_effect = capture_create
+
+        response = await mock_ai_generator.generate_response(
+            query="Show me the outline for the MCP course",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        assert response == "Here is the outline"
+
+        # Tool ran exactly once - the speculative task was reused, not
+        # re-dispatched when Claude asked for the same call
+        assert tool_manager.execute_tool.call_count == 1
+        tool_manager.execute_tool.assert_called_once_with(
+            "get_course_outline", course_title="MCP"
+        )
+
+        # Its result was sent back as the round's tool_result
+        second_call_messages = api_calls[1]["messages"]
+        assert (
+            second_call_messages[-1]["content"][0]["content"]
+            == "Course outline result"
+        )
+
+    async def test_speculation_cancelled_when_not_requested(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that an unused speculative call doesn't pollute the response"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Course outline result")
+
+        # Claude answers directly without using any tool
+        mock_ai_generator.client.messages.create.side_effect = None
+        mock_ai_generator.client.messages.create.return_value = text_response(
+            "Direct answer"
+        )
+
+        response = await mock_ai_generator.generate_response(
+            query="Show me the outline for the MCP course",
+            tools=tool_defs,
+            tool_manager=tool_manager,
+        )
+
+        assert response == "Direct answer"
+        # The speculative task may or may not have started before being
+        # cancelled, but it must not have been dispatched a second time
+        assert tool_manager.execute_tool.call_count <= 1
+
+    async def test_generate_response_stream_final_round(
+        self, mock_ai_generator, configured_tool_manager, tool_defs
+    ):
+        """Test that the final round streams text chunks after tool rounds"""
+        tool_manager = configured_tool_manager
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        # Both tool rounds request tools, so the final call streams
+        def mock_create(**kwargs):
+            return tool_use_response(
+                "search_course_content", {"query": "test"}, "tool_use_1"
+            )
+
+        mock_ai_generator.client.messages.create.side_effect = mock_create
+
+        class FakeMessageStream:
+            def __init__(self, chunks):
+                self.text_stream = self._agen(chunks)
+
+            @staticmethod
+            async def _agen(chunks):
+                for chunk in chunks:
+                    yield chunk
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return False
+
+        stream_calls = []
+
+        def mock_stream(**kwargs):
+            stream_calls.append(kwargs)
+            return FakeMessageStream(["Streamed ", "final ", "answer"])
+
+        mock_ai_generator.client.messages.stream = Mock(side_effect=mock_stream)
+
+        chunks = [
+            text
+            async for text in mock_ai_generator.generate_response_stream(
+                query="Test query",
+                tools=tool_defs,
+                tool_manager=tool_manager,
+            )
+        ]
+
+        assert chunks == ["Streamed ", "final ", "answer"]
+
+        # Two non-streaming tool rounds, then one streaming final call
+        assert mock_ai_generator.client.messages.create.call_count == 2
+        assert len(stream_calls) == 1
+        assert "tools" not in stream_calls[0]
+
+    async def test_generate_response_stream_without_tools(self, mock_ai_generator):
+        """Test that tool-less queries skip straight to the streaming call"""
+
+        class FakeMessageStream:
+            def __init__(self, chunks):
+                self.text_stream = self._agen(chunks)
+
+            @staticmethod
+            async def _agen(chunks):
+                for chunk in chunks:
+                    yield chunk
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return False
+
+        mock_ai_generator.client.messages.stream = Mock(
+            return_value=FakeMessageStream(["General ", "knowledge ", "answer"])
+        )
+
+        chunks = [
+            text
+            async for text in mock_ai_generator.generate_response_stream(
+                query="What is Python?"
+            )
+        ]
+
+        assert chunks == ["General ", "knowledge ", "answer"]
+        mock_ai_generator.client.messages.stream.assert_called_once()
+        mock_ai_generator.client.messages.create.assert_not_called()
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from batcher import QueryBatcher
+
+
+class TestQueryBatcher:
+    """Test suite for the micro-batching query queue"""
+
+    async def test_single_query_takes_direct_path(self):
+        """Test that a lone query is sent through unchanged"""
+
+        async def generate_fn(prompt):
+            return f"single answer to: {prompt}"
+
+        batcher = QueryBatcher(generate_fn, max_batch=8, window_ms=10.0)
+        batcher.start()
+        try:
+            result = await batcher.submit("What is Python?")
+        finally:
+            batcher.stop()
+
+        assert result == "single answer to: What is Python?"
+
+    async def test_concurrent_queries_share_one_call(self):
+        """Test that queries inside the window batch into a single LLM call"""
+        calls = []
+
+        async def generate_fn(prompt):
+            calls.append(prompt)
+            return json.dumps(["A1", "A2", "A3"])
+
+        batcher = QueryBatcher(generate_fn, max_batch=8, window_ms=50.0)
+        batcher.start()
+        try:
+            results = await asyncio.gather(
+                batcher.submit("Q1"), batcher.submit("Q2"), batcher.submit("Q3")
+            )
+        finally:
+            batcher.stop()
+
+        assert results == ["A1", "A2", "A3"]
+        assert len(calls) == 1
+        assert calls[0].startswith(QueryBatcher.BATCH_PROMPT_HEADER)
+        assert "1. Q1" in calls[0]
+        assert "3. Q3" in calls[0]
+
+    async def test_malformed_batch_response_falls_back_to_singles(self):
+        """Test that an unparseable batched answer retries queries individually"""
+        calls = []
+
+        async def generate_fn(prompt):
+            calls.append(prompt)
+            if prompt.startswith(QueryBatcher.BATCH_PROMPT_HEADER):
+                return "Sorry, I can't answer these as JSON."
+            return f"single: {prompt}"
+
+        batcher = QueryBatcher(generate_fn, max_batch=8, window_ms=50.0)
+        batcher.start()
+        try:
+            results = await asyncio.gather(batcher.submit("Q1"), batcher.submit("Q2"))
+        finally:
+            batcher.stop()
+
+        assert results == ["single: Q1", "single: Q2"]
+        # One failed batched call plus one individual call per query
+        assert len(calls) == 3
+
+    async def test_batch_size_cap_respected(self):
+        """Test that no more than max_batch queries share a call"""
+        calls = []
+
+        async def generate_fn(prompt):
+            calls.append(prompt)
+            if prompt.startswith(QueryBatcher.BATCH_PROMPT_HEADER):
+                count = sum(
+                    1 for line in prompt.splitlines() if line[:1].isdigit()
+                )
+                return json.dumps([f"A{i}" for i in range(count)])
+            return "single"
+
+        batcher = QueryBatcher(generate_fn, max_batch=2, window_ms=50.0)
+        batcher.start()
+        try:
+            results = await asyncio.gather(*[batcher.submit(f"Q{i}") for i in range(4)])
+        finally:
+            batcher.stop()
+
+        assert len(results) == 4
+        for prompt in calls:
+            if prompt.startswith(QueryBatcher.BATCH_PROMPT_HEADER):
+                numbered = sum(
+                    1 for line in prompt.splitlines() if line[:1].isdigit()
+                )
+                assert numbered <= 2
+
+    async def test_generate_failure_propagates_for_single(self):
+        """Test that a failing single call surfaces its exception to the caller"""
+        generate_fn = AsyncMock(side_effect=RuntimeError("API down"))
+        batcher = QueryBatcher(generate_fn, max_batch=8, window_ms=10.0)
+        batcher.start()
+        try:
+            with pytest.raises(RuntimeError, match="API down"):
+                await batcher.submit("Q1")
+        finally:
+            batcher.stop()
+
+    def test_parse_answers_strips_markdown_fence(self):
+        """Test that a fenced JSON array is still parsed"""
+        raw = '```json\n["A", "B"]\n```'
+        assert QueryBatcher._parse_answers(raw, expected=2) == ["A", "B"]
+
+    def test_parse_answers_rejects_wrong_count(self):
+        """Test that a length mismatch raises instead of misrouting answers"""
+        with pytest.raises(ValueError, match="Expected 3 answers"):
+            QueryBatcher._parse_answers('["A", "B"]', expected=3)
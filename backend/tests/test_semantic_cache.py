@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+import pytest
+from semantic_cache import LLMSemanticCache
+
+
+def fake_embed(texts):
+    """Deterministic embedding stub - maps known phrases to fixed directions"""
+    vectors = {
+        "what is python?": [1.0, 0.0, 0.0],
+        "tell me about python": [0.98, 0.2, 0.0],  # paraphrase, high similarity
+        "what is mcp?": [0.0, 1.0, 0.0],
+    }
+    return [vectors.get(text.lower(), [0.0, 0.0, 1.0]) for text in texts]
+
+
+class TestLLMSemanticCache:
+    """Test suite for the embedding-based response cache"""
+
+    @pytest.fixture
+    def cache(self):
+        """Create a cache with the stub embedding function"""
+        return LLMSemanticCache(fake_embed, threshold=0.92, ttl=3600)
+
+    def test_empty_cache_misses(self, cache):
+        """Test that lookups against an empty cache return None"""
+        assert cache.get("What is Python?") is None
+
+    def test_exact_query_hits(self, cache):
+        """Test that an identical query returns the cached answer"""
+        cache.put("What is Python?", "Python is a language", [{"text": "Lesson 1"}])
+
+        result = cache.get("What is Python?")
+
+        assert result is not None
+        answer, sources = result
+        assert answer == "Python is a language"
+        assert sources == [{"text": "Lesson 1"}]
+
+    def test_paraphrased_query_hits(self, cache):
+        """Test that a near-identical paraphrase is served from cache"""
+        cache.put("What is Python?", "Python is a language", [])
+
+        result = cache.get("Tell me about Python")
+
+        assert result is not None
+        assert result[0] == "Python is a language"
+
+    def test_dissimilar_query_misses(self, cache):
+        """Test that an unrelated query does not hit the cache"""
+        cache.put("What is Python?", "Python is a language", [])
+
+        assert cache.get("What is MCP?") is None
+
+    def test_expired_entry_misses(self, cache):
+        """Test that entries past their TTL are not returned"""
+        cache.ttl = -1  # Entries expire immediately
+        cache.put("What is Python?", "Python is a language", [])
+
+        assert cache.get("What is Python?") is None
+
+    def test_multiple_entries_best_match_wins(self, cache):
+        """Test that lookup returns the most similar cached entry"""
+        cache.put("What is Python?", "Python answer", [])
+        cache.put("What is MCP?", "MCP answer", [])
+
+        result = cache.get("What is MCP?")
+
+        assert result is not None
+        assert result[0] == "MCP answer"
+
+    def test_embeddings_are_normalized(self, cache):
+        """Test that stored embeddings are unit vectors (cosine via dot product)"""
+        cache.put("What is Python?", "Python answer", [])
+
+        norms = np.linalg.norm(cache._embeddings, axis=1)
+        assert np.allclose(norms, 1.0)
+
+    def test_expired_entry_does_not_mask_valid_match(self, cache):
+        """Test that a valid paraphrase hit survives an expired best match
+
+        Expired rows are pruned on access, so an expired exact match can't
+        shadow a still-valid similar entry.
+        """
+        cache.ttl = -1  # Expired immediately
+        cache.put("What is Python?", "Stale answer", [])
+        cache.ttl = 3600
+        cache.put("Tell me about Python", "Fresh answer", [])
+
+        result = cache.get("What is Python?")
+
+        assert result is not None
+        assert result[0] == "Fresh answer"
+
+    def test_max_entries_evicts_oldest(self):
+        """Test that the cache keeps at most max_entries, dropping oldest first"""
+        cache = LLMSemanticCache(fake_embed, threshold=0.92, ttl=3600, max_entries=2)
+
+        cache.put("What is Python?", "Python answer", [])
+        cache.put("What is MCP?", "MCP answer", [])
+        cache.put("Something else entirely", "Other answer", [])
+
+        assert len(cache._entries) == 2
+        assert len(cache._embeddings) == 2
+        # Oldest entry evicted, newer ones still served
+        assert cache.get("What is Python?") is None
+        assert cache.get("What is MCP?")[0] == "MCP answer"
+
+    def test_expired_entries_pruned_on_put(self, cache):
+        """Test that put drops expired rows instead of growing forever"""
+        cache.ttl = -1
+        cache.put("What is Python?", "Stale answer", [])
+        cache.put("What is MCP?", "Stale answer", [])
+        cache.ttl = 3600
+
+        cache.put("Tell me about Python", "Fresh answer", [])
+
+        assert len(cache._entries) == 1
+        assert len(cache._embeddings) == 1
@@ -1,28 +1,33 @@
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 import pytest
 from vector_store import SearchResults, VectorStore
 
+# Keep this file on one pytest-xdist worker (scripts/test.sh runs
+# -n auto --dist loadgroup) so the fixtures stay worker-local
+pytestmark = pytest.mark.xdist_group("vector_store")
+
 
 class TestVectorStore:
     """Test suite for VectorStore validation and error handling"""
 
     @pytest.fixture
     def mock_vector_store(self):
-        """Create a VectorStore with mocked ChromaDB"""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-            store = VectorStore("./test_db", "all-MiniLM-L6-v2", max_results=5)
+        """Create a VectorStore with mocked ChromaDB
+
+        __new__ skips __init__ entirely: these tests exercise search
+        validation, which only touches max_results and the collection
+        attributes, so there is nothing for the ChromaDB client or the
+        embedding-function patches to guard anymore.
+        """
+        store = VectorStore.__new__(VectorStore)
+        store.max_results = 5
 
-            # Mock the collections
-            store.course_catalog = Mock()
-            store.course_content = Mock()
+        # Mock the collections
+        store.course_catalog = Mock()
+        store.course_content = Mock()
 
-            return store
+        return store
 
     def test_search_with_valid_limit(self, mock_vector_store):
         """Test search with valid limit parameter"""
@@ -62,25 +67,20 @@ class TestVectorStore:
 
     def test_search_with_invalid_max_results_config(self):
         """Test that VectorStore with invalid max_results from config fails validation"""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            # Create store with invalid max_results
-            store = VectorStore("./test_db", "all-MiniLM-L6-v2", max_results=0)
+        # Build the store with invalid max_results, bypassing __init__ like
+        # the fixture above - the validation under test lives in search()
+        store = VectorStore.__new__(VectorStore)
+        store.max_results = 0
 
-            # Mock collections
-            store.course_catalog = Mock()
-            store.course_content = Mock()
+        # Mock collections
+        store.course_catalog = Mock()
+        store.course_content = Mock()
 
-            # When search is called without explicit limit, should use max_results=0 and fail
-            result = store.search("test query")
+        # When search is called without explicit limit, should use max_results=0 and fail
+        result = store.search("test query")
 
-            assert result.error == "Invalid search limit: 0. Must be >= 1"
-            assert result.is_empty()
+        assert result.error == "Invalid search limit: 0. Must be >= 1"
+        assert result.is_empty()
 
     def test_search_uses_default_max_results_when_no_limit_provided(
         self, mock_vector_store
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 
 import chromadb
 from chromadb.config import Settings
@@ -11,9 +11,11 @@ from sentence_transformers import SentenceTransformer
 class SearchResults:
     """Container for search results with metadata"""
 
-    documents: List[str]
-    metadata: List[Dict[str, Any]]
-    distances: List[float]
+    # Read-only sequences: consumers only iterate, so callers may pass
+    # tuples to share immutable instances
+    documents: Sequence[str]
+    metadata: Sequence[Mapping[str, Any]]
+    distances: Sequence[float]
     error: Optional[str] = None
 
     @classmethod
@@ -0,0 +1,15 @@
+#!/bin/bash
+
+# Test runner script
+# Runs the backend suite in parallel with pytest-xdist; tests that share
+# module-scoped fixtures are pinned to one worker via xdist_group markers
+
+set -e
+
+echo "🧪 Running backend tests..."
+
+cd backend
+# -m "" re-includes the slow tests that the default addopts exclude
+uv run pytest -n auto --dist loadgroup -m "" --durations=20 "$@"
+
+echo "✅ All tests passed!"